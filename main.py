@@ -1,12 +1,27 @@
 import pygame
+import argparse
 import logging
+import random
+import time
 import os
 
-from src.config import Config, GameState
+from src.config import Config
 from src.game_service import Game
+from src.audio_service import AudioService
+from src.simulation import HeadlessRunner
+from src.controls import KeyboardInput
+from src.replay import InputRecorder, Replay, play
+from src.display_service import DisplayService
+from src.loader import AssetLoader, LoadingScreen
+from src.history import RunHistory
+from src import logging_service
+from src.bundle import Bundle
+from src.benchmark import BenchmarkSuite
+from src.assets import AssetRegistry
 
-def main():
+def main(seed: int=None, record: str=None, window: tuple=None, scaled: bool=None):
     log.info("Game start.")
+    AudioService.pre_init()
     pygame.init()
 
     # pygame event handling
@@ -15,43 +30,200 @@ def main():
     pygame.key.set_repeat()
     pygame.mouse.set_visible(False)
 
-    # initialise objects
-    game = Game()
+    # decode assets on worker threads behind a loading screen
+    display = DisplayService(window=window, scaled=scaled)
     clock = pygame.time.Clock()
+    loader = AssetLoader()
+    Game.preload(loader)
+    loading = LoadingScreen(display.screen)
+    while not loader.ready:
+        if pygame.event.peek(pygame.QUIT):
+            log.info("Exit during loading.")
+            pygame.quit()
+            raise SystemExit
+        loading.draw(loader.poll())
+        display.present()
+        clock.tick(Config.FPS)
+    log.info("Assets loaded.")
 
+    # initialise objects
+    controls = KeyboardInput()
+    if record:
+        seed = seed if seed is not None else random.randrange(2**32)
+        controls = InputRecorder(controls)
+    history = RunHistory()
+    game = Game(seed=seed, controls=controls, display=display, history=history)
+
+    # the first frame runs one simulation tick
+    dt = 1 / Config.TICK_RATE
     while game.running:
-        if Config.status is GameState.GAME_END:
-            game.death()
-        elif Config.status == GameState.GAME_PLAY:
-            if game.paused:
-                game.pause()
-            else:
-                game.run()
-        
-        pygame.display.flip()
-        clock.tick(Config.FPS)
-        log.debug(f"FPS: {clock.get_fps()}")
+        game.profiler.begin_frame()
+        # the music may still be decoding
+        if not loader.done:
+            loader.poll()
+        alpha = game.advance(dt)
+        game.render(alpha)
+
+        game.display.mark(game.profiler.draw(game.screen))
+        with game.profiler.phase("flip"):
+            game.display.present()
+        game.govern(game.profiler.end_frame())
+        dt = clock.tick(Config.FPS) / 1000
+        if logging_service.HOT:
+            log.debug("FPS: %.1f", clock.get_fps(), extra=logging_service.LIMITED)
     
     # exit
+    if Config.profiler:
+        game.profiler.dump(Config.profile_path)
+    history.close()
+    if record:
+        controls.replay(seed, game.scoreboard.score, game.first_game_over).save(record)
+        log.info(f"Replay saved to {record}")
     log.info("Game end.")
     pygame.quit()
     raise SystemExit    
 
+def headless(ticks: int, seed: int):
+    log.info("Headless run start.")
+    result = HeadlessRunner(seed=seed).run(ticks)
+    print(
+        f"{result.ticks} ticks in {result.seconds:.2f}s "
+        f"({result.ticks_per_second:.1f} ticks/s), final score {result.score}"
+        )
+    pygame.quit()
+
+def batch(envs: int, workers: int, ticks: int, seed: int):
+    """Steps a batch of games with random actions and reports the throughput."""
+    import numpy as np
+    from src.env import NUM_ACTIONS, BatchEnv, ShardedBatchEnv
+
+    log.info(f"Batch run of {envs} games on {workers} workers start.")
+    env = BatchEnv(envs, seed) if workers == 1 else ShardedBatchEnv(envs, workers, seed)
+    rng = np.random.default_rng(seed)
+    env.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(ticks):
+        episodes += env.step(rng.integers(NUM_ACTIONS, size=envs)).done.sum()
+    seconds = time.perf_counter() - start
+    env.close()
+    print(
+        f"{envs * ticks} env steps in {seconds:.2f}s "
+        f"({envs * ticks / seconds:.1f} steps/s), {episodes} runs ended"
+        )
+    pygame.quit()
+
+def benchmark(path: str, baseline: str=None, tolerance: float=None):
+    """Runs the benchmark suite, writing the results to path and comparing them against a baseline file."""
+    log.info("Benchmark start.")
+    results = BenchmarkSuite().run()
+    BenchmarkSuite.save(results, path)
+    reference = BenchmarkSuite.load(baseline) if baseline else {}
+    print(f"{'benchmark':<24} {'median us':>10} {'best us':>10} {'base best':>10} {'change':>8}")
+    for name, result in results.items():
+        line = f"{name:<24} {result.median:>10.2f} {result.best:>10.2f}"
+        if name in reference:
+            change = result.best / reference[name].best - 1
+            line += f" {reference[name].best:>10.2f} {change:>+8.1%}"
+        print(line)
+    print(f"Results written to {path}")
+    pygame.quit()
+    if baseline:
+        regressions = BenchmarkSuite.compare(results, reference, tolerance)
+        for name, before, after in regressions:
+            print(f"{name}: regressed from {before.best:.2f} to {after.best:.2f} us")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions against {baseline}")
+
+def asset_report():
+    """Loads every startup image and prints the format each was given."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    pygame.init()
+    DisplayService(offscreen=True)
+    for path, alpha, scale in Game.images():
+        AssetRegistry.image(path, alpha, scale)
+    report = AssetRegistry.report()
+    for path, kind in report:
+        print(f"{kind:<10} {path}")
+    kinds = [kind for _, kind in report]
+    print(", ".join(f"{kinds.count(kind)} {kind}" for kind in (AssetRegistry.OPAQUE, AssetRegistry.COLORKEY, AssetRegistry.ALPHA)))
+    pygame.quit()
+
+def leaderboard(n: int=10):
+    history = RunHistory()
+    for rank, run in enumerate(history.top(n), 1):
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(run.finished))
+        print(f"{rank:>3}. {run.score:>5}  {run.run_time:>8.2f}s  speed {run.max_speed:>3}  {finished}")
+    history.close()
+
+def replay(paths: list):
+    log.info(f"Replaying {len(paths)} replays.")
+    start = time.perf_counter()
+    ticks = failures = 0
+    for path in paths:
+        result = play(Replay.load(path))
+        ticks += result.result.ticks
+        if not result.verified:
+            failures += 1
+            print(
+                f"{path}: diverged, expected game over at tick {result.replay.game_over} and score {result.replay.score}, "
+                f"got game over at tick {result.game_over} and score {result.result.score}"
+                )
+    seconds = time.perf_counter() - start
+    print(f"{len(paths) - failures}/{len(paths)} replays verified, {ticks} ticks in {seconds:.2f}s")
+    pygame.quit()
+    if failures:
+        raise SystemExit(1)
+
 if __name__ == "__main__":
-    # setup logger
-    log_format = "%(asctime)s - %(levelname)s - %(name)s - %(filename)s - %(lineno)d - %(message)s"
+    parser = argparse.ArgumentParser(description="Running Man")
+    parser.add_argument("--headless", action="store_true", help="simulate without a window, audio or frame cap")
+    parser.add_argument("--ticks", type=int, default=10000, help="ticks to simulate in headless mode")
+    parser.add_argument("--seed", type=int, default=None, help="random seed, default 0 in headless mode")
+    parser.add_argument("--record", metavar="PATH", help="record the session's inputs to a replay file")
+    parser.add_argument("--replay", metavar="PATH", nargs="+", help="verify replay files headlessly")
+    parser.add_argument("--window", metavar="WxH", help="window size, the game is scaled to fit, e.g. 1920x1080")
+    parser.add_argument("--scaled", action="store_true", default=None, help="let SDL scale the game to fit the desktop")
+    parser.add_argument("--build-bundle", action="store_true", help="pack the images into the asset bundle loaded at startup")
+    parser.add_argument("--bench", metavar="PATH", nargs="?", const=Config.bench_path, help="run the benchmark suite and write the results to PATH")
+    parser.add_argument("--baseline", metavar="PATH", help="fail --bench if slower than these saved results")
+    parser.add_argument("--tolerance", type=float, default=None, help="slowdown against the baseline allowed, default 0.2")
+    parser.add_argument("--asset-report", action="store_true", help="print the surface format chosen for each image")
+    parser.add_argument("--leaderboard", action="store_true", help="print the best recorded runs")
+    parser.add_argument("--envs", type=int, default=None, help="step this many headless games with random actions")
+    parser.add_argument("--workers", type=int, default=1, help="processes to shard --envs games across")
+    args = parser.parse_args()
+
+    # setup logger, records are written to the file on a background thread
     log = logging.getLogger("runningman")
-    log.setLevel(Config.log_level)
     if not os.path.isdir("logs"):
         os.mkdir("logs")
-    file_handler = logging.FileHandler("logs/app.log", mode='w')
-    formatter = logging.Formatter(log_format)
-    file_handler.setFormatter(formatter)
-    log.addHandler(file_handler)
+    listener = logging_service.start("logs/app.log")
 
     if Config.log:
         logging.disable(logging.NOTSET)
     elif Config.log is False:
         logging.disable(logging.CRITICAL)
 
-    main()
\ No newline at end of file
+    try:
+        if args.build_bundle:
+            Bundle.build()
+            print(f"Asset bundle written to {Config.bundle_path}")
+        elif args.bench:
+            benchmark(args.bench, args.baseline, args.tolerance)
+        elif args.asset_report:
+            asset_report()
+        elif args.leaderboard:
+            leaderboard()
+        elif args.replay:
+            replay(args.replay)
+        elif args.envs:
+            batch(args.envs, args.workers, args.ticks, args.seed if args.seed is not None else 0)
+        elif args.headless:
+            headless(args.ticks, args.seed if args.seed is not None else 0)
+        else:
+            window = tuple(int(n) for n in args.window.lower().split("x")) if args.window else None
+            main(args.seed, args.record, window, args.scaled)
+    finally:
+        listener.stop()
\ No newline at end of file
@@ -0,0 +1,286 @@
+import pygame
+import os
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+
+from .config import Config
+
+class AssetRegistry:
+    """
+    A process-wide cache of decoded images, shared by every sprite.
+
+    Each image file is decoded and converted once. Scaled and flipped variants
+    are cached by (path, alpha, scale, flip) for the whole session, except
+    transient ones, the randomly scaled trees and bushes, which are kept in a
+    bounded LRU of their own so they cannot grow the cache without limit or
+    evict the fixed variants every run draws.
+    Surfaces handed out are shared, callers must copy before mutating them.
+    Lookups are locked, so the course generator can prepare images on its
+    background thread. Images found in the asset bundle at
+    Config.bundle_path are mapped from it instead of decoded.
+
+    Images loaded with alpha are given the fastest format that draws them
+    the same, chosen from their alpha channel by optimise(): fully opaque
+    images are converted without alpha, images whose pixels are all either
+    transparent or opaque get an RLE accelerated colour key, and only images
+    with more than Config.alpha_partial_limit of their pixels partially
+    transparent keep per-pixel alpha. Images below the limit have their
+    alpha rounded at 128, the threshold collision masks use, so masks are
+    unchanged. The format each image got is kept in formats.
+
+    Methods
+    ---
+    image(path: str, alpha: bool=True, scale: float=1.0, flip: bool=False, transient: bool=False) -> pygame.Surface
+        Returns the shared Surface for the given variant of an image.
+    mask(path: str, scale: float=1.0, flip: bool=False) -> pygame.mask.Mask
+        Returns the shared collision mask for the given variant of an image.
+    decode(path: str, scale: float=1.0) -> pygame.Surface
+        Loads and scales an image without converting it, safe off the main thread.
+    adopt(path: str, alpha: bool, scale: float, image: pygame.Surface) -> None
+        Converts a decoded image and caches it as if image() had loaded it.
+    optimise(image: pygame.Surface, path: str=None) -> pygame.Surface
+        Converts an image to the fastest format that draws it, recording it
+        under path in formats.
+    free_key(*images: pygame.Surface) -> tuple or None
+        Returns a colour key none of the images draw with.
+    report() -> list
+        Returns (path, format) for every image loaded so far.
+    bundle() -> Bundle or None
+        Returns the asset bundle, opening it on first use, or None if there
+        is none or it cannot be read.
+    clear() -> None
+        Drops every cached Surface and Mask.
+    """
+    logger = logging.getLogger("runningman.assets.AssetRegistry")
+    _sources = {}
+    _variants = {}
+    _transient = OrderedDict()
+    _masks = OrderedDict()
+    _lock = threading.RLock()
+    _bundle = None
+    _bundle_checked = False
+    # image formats chosen by optimise(), see formats
+    OPAQUE = "opaque"
+    COLORKEY = "colorkey"
+    ALPHA = "alpha"
+    # colour keys tried in turn, the first not used by the image's opaque pixels is taken
+    key_colours = ((255, 0, 255), (0, 255, 255), (255, 255, 0), (1, 2, 3))
+    # path -> format of every image optimised
+    formats = {}
+
+    @staticmethod
+    def quantise(scale: float) -> float:
+        """Rounds a scale factor to Config.asset_scale_step so near-identical variants share a cache entry."""
+        step = Config.asset_scale_step
+        return round(round(scale / step) * step, 4)
+
+    @classmethod
+    def source(cls, path: str, alpha: bool=True) -> pygame.Surface:
+        """Returns the decoded and converted, unscaled Surface for path."""
+        with cls._lock:
+            key = (path, alpha)
+            image = cls._sources.get(key)
+            if image is None:
+                image = cls.from_bundle(path, 1.0, alpha)
+                if image is None:
+                    image = pygame.image.load(path)
+                    image = cls.optimise(image, path) if alpha else cls.record(path, cls.OPAQUE, image.convert())
+                    cls.logger.debug(f"Loaded {path}")
+                cls._sources[key] = image
+            return image
+
+    @classmethod
+    def image(cls, path: str, alpha: bool=True, scale: float=1.0, flip: bool=False, transient: bool=False) -> pygame.Surface:
+        """
+        Returns the shared Surface for path, scaled by scale and mirrored
+        horizontally if flip. Transient variants may be evicted to make room
+        for others.
+        """
+        with cls._lock:
+            scale = cls.quantise(scale) if scale else 1.0
+            key = (path, alpha, scale, bool(flip))
+            image = cls._variants.get(key)
+            if image is not None:
+                return image
+            image = cls._transient.get(key)
+            if image is not None:
+                cls._transient.move_to_end(key)
+                return image
+
+            image = cls.from_bundle(path, scale, alpha) if not flip and scale != 1.0 else None
+            if image is not None:
+                cls.keep(key, image, transient)
+                return image
+
+            image = cls.source(path, alpha)
+            if flip:
+                image = pygame.transform.flip(image, True, False)
+            if scale != 1.0:
+                image = pygame.transform.scale_by(image, scale)
+            cls.accelerate(image)
+            cls.keep(key, image, transient)
+            return image
+
+    @classmethod
+    def keep(cls, key: tuple, image: pygame.Surface, transient: bool) -> None:
+        """Caches a variant, evicting the least recently used transient one if there are too many."""
+        if not transient:
+            cls._variants[key] = image
+            return
+        cls._transient[key] = image
+        if len(cls._transient) > Config.asset_cache_size:
+            cls._transient.popitem(last=False)
+
+    @classmethod
+    def mask(cls, path: str, scale: float=1.0, flip: bool=False) -> pygame.mask.Mask:
+        """Returns the shared collision mask for the alpha variant of path."""
+        with cls._lock:
+            scale = cls.quantise(scale) if scale else 1.0
+            key = (path, scale, bool(flip))
+            mask = cls._masks.get(key)
+            if mask is not None:
+                cls._masks.move_to_end(key)
+                return mask
+
+            mask = pygame.mask.from_surface(cls.image(path, True, scale, flip))
+            cls._masks[key] = mask
+            if len(cls._masks) > Config.asset_cache_size:
+                cls._masks.popitem(last=False)
+            return mask
+
+    @classmethod
+    def bundle(cls):
+        with cls._lock:
+            if not cls._bundle_checked:
+                cls._bundle_checked = True
+                if os.path.isfile(Config.bundle_path):
+                    # imported here, building a bundle needs the registry
+                    from .bundle import Bundle
+                    try:
+                        cls._bundle = Bundle(Config.bundle_path)
+                    except (OSError, ValueError) as e:
+                        cls.logger.warning(f"Ignoring the asset bundle, loading images from source: {e}")
+            return cls._bundle
+
+    @classmethod
+    def from_bundle(cls, path: str, scale: float, alpha: bool=True):
+        """Returns the bundled Surface for path at an already quantised scale, or None if it is not bundled."""
+        bundle = cls.bundle()
+        if bundle is None:
+            return None
+        image = bundle.surface(bundle.key(path, scale))
+        if image is not None:
+            image = cls.optimise(image, path) if alpha else cls.record(path, cls.OPAQUE, image.convert())
+            cls.logger.debug(f"Mapped {path} at scale {scale} from the bundle")
+        return image
+
+    @classmethod
+    def bundled_frame(cls, path: str, x: int, y: int, w: int, h: int):
+        """Returns the bundled animation frame cut from the sheet at path, or None if it is not bundled."""
+        bundle = cls.bundle()
+        if bundle is None:
+            return None
+        image = bundle.surface(bundle.frame_key(path, x, y, w, h))
+        if image is not None:
+            image = cls.optimise(image)
+        return image
+
+    @classmethod
+    def optimise(cls, image: pygame.Surface, path: str=None) -> pygame.Surface:
+        if image.get_masks()[3] == 0:
+            # no alpha channel, only a colour key can make pixels transparent
+            key = image.get_colorkey()
+            image = image.convert()
+            if key is not None:
+                image.set_colorkey(key, pygame.RLEACCEL)
+            return cls.record(path, cls.COLORKEY if key is not None else cls.OPAQUE, image)
+
+        alpha = pygame.surfarray.array_alpha(image)
+        partial = np.count_nonzero((alpha > 0) & (alpha < 255))
+        opaque = alpha >= 128
+        if partial > alpha.size * Config.alpha_partial_limit:
+            key = None
+        elif opaque.all():
+            return cls.record(path, cls.OPAQUE, image.convert())
+        else:
+            key = cls.free_key(image)
+        if key is None:
+            if not cls.display_format(image):
+                image = image.convert_alpha()
+            return cls.record(path, cls.ALPHA, image)
+
+        if partial:
+            image = image.copy()
+            pygame.surfarray.pixels_alpha(image)[...] = np.where(opaque, 255, 0)
+        keyed = pygame.Surface(image.get_size()).convert()
+        keyed.fill(key)
+        keyed.blit(image, (0, 0))
+        keyed.set_colorkey(key, pygame.RLEACCEL)
+        return cls.record(path, cls.COLORKEY, keyed)
+
+    @classmethod
+    def free_key(cls, *images: pygame.Surface):
+        """Returns the first of key_colours not drawn by any of the images, or None if they use them all."""
+        used = set()
+        for image in images:
+            drawn = (pygame.surfarray.array_alpha(image) >= 128) & (pygame.surfarray.array_colorkey(image) > 0)
+            rgb = pygame.surfarray.array3d(image)[drawn].astype(np.uint32)
+            used.update(np.unique((rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]).tolist())
+        return next((c for c in cls.key_colours if (c[0] << 16) | (c[1] << 8) | c[2] not in used), None)
+
+    @classmethod
+    def record(cls, path: str, kind: str, image: pygame.Surface) -> pygame.Surface:
+        if path is not None and cls.formats.get(path) != kind:
+            cls.formats[path] = kind
+            cls.logger.debug(f"{path} drawn with {kind}")
+        return image
+
+    @staticmethod
+    def accelerate(image: pygame.Surface) -> pygame.Surface:
+        """Turns on RLE acceleration for an image with a colour key, such as one scaled or flipped from a keyed image."""
+        key = image.get_colorkey()
+        if key is not None:
+            image.set_colorkey(key, pygame.RLEACCEL)
+        return image
+
+    @classmethod
+    def report(cls) -> list:
+        return sorted(cls.formats.items())
+
+    @staticmethod
+    def display_format(image: pygame.Surface) -> bool:
+        """True if image can be blitted to the display without converting pixels."""
+        display = pygame.display.get_surface()
+        return display is not None and image.get_bitsize() == 32 and image.get_masks()[:3] == display.get_masks()[:3]
+
+    @classmethod
+    def decode(cls, path: str, scale: float=1.0) -> pygame.Surface:
+        image = pygame.image.load(path)
+        scale = cls.quantise(scale) if scale else 1.0
+        if scale != 1.0:
+            image = pygame.transform.scale_by(image, scale)
+        return image
+
+    @classmethod
+    def adopt(cls, path: str, alpha: bool, scale: float, image: pygame.Surface) -> None:
+        # converting needs the display, so this runs on the main thread
+        image = cls.optimise(image, path) if alpha else cls.record(path, cls.OPAQUE, image.convert())
+        scale = cls.quantise(scale) if scale else 1.0
+        with cls._lock:
+            if scale == 1.0:
+                cls._sources[(path, alpha)] = image
+            else:
+                cls._variants[(path, alpha, scale, False)] = image
+        cls.logger.debug(f"Adopted {path} at scale {scale}")
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drops every cached Surface and Mask."""
+        cls._sources.clear()
+        cls._variants.clear()
+        cls._transient.clear()
+        cls._masks.clear()
+        cls.formats.clear()
+        cls.logger.debug("AssetRegistry cleared.")
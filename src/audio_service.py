@@ -1,40 +1,155 @@
 import pygame
+import logging
 from .config import Config
 
 class AudioService():
+    """
+    Plays music and sound effects from a bank decoded once at startup.
+
+    Each effect category owns a reserved mixer channel, so frequent score
+    dings never steal the channel a jump is playing on.
+    """
+    logger = logging.getLogger("runningman.audio_service.AudioService")
+    effects = {
+        "jump": "./assets/audio/jump.mp3",
+        "hit": "./assets/audio/hit.wav",
+        "score": "./assets/audio/score.wav",
+    }
+    bgm = "./assets/audio/8bit_bgm.mp3"
+    # headless runs turn music off, decoding the track costs seconds and
+    # nothing would hear it
+    music = True
+    volume = Config.volume
+    _sounds = {}
+    _channels = {}
+    _bgm_loaded = False
+    # set while a loader thread decodes the music, SDL_mixer's music state is
+    # not thread safe so every music call is deferred until it is done
+    _bgm_pending = False
+    _bgm_wanted = False
+    _bgm_paused = False
+
+    @staticmethod
+    def pre_init():
+        """Requests a small mixer buffer for low latency, call before pygame.init()."""
+        pygame.mixer.pre_init(
+            frequency=Config.audio_frequency,
+            buffer=Config.audio_buffer
+            )
+
+    @staticmethod
+    def load():
+        """Decodes every sound effect and reserves one mixer channel per effect."""
+        if not pygame.mixer.get_init():
+            AudioService.logger.warning("Mixer not initialised, sound effects disabled.")
+            return
+        if AudioService._channels:
+            return
+        pygame.mixer.set_reserved(len(AudioService.effects))
+        for channel_id, (name, path) in enumerate(AudioService.effects.items()):
+            # effects an AssetLoader already decoded are kept
+            if name not in AudioService._sounds:
+                AudioService._sounds[name] = pygame.mixer.Sound(path)
+            AudioService._channels[name] = pygame.mixer.Channel(channel_id)
+        AudioService.set_volume(AudioService.volume)
+        AudioService.logger.debug(f"Sound bank loaded: {list(AudioService._sounds)}")
+
+    @staticmethod
+    def adopt_sound(name: str, sound: pygame.mixer.Sound):
+        """Takes an effect decoded elsewhere, so load() does not decode it again."""
+        AudioService._sounds[name] = sound
+
+    @staticmethod
+    def decode_bgm():
+        """Decodes the background music, safe to call from a loader thread once bgm_pending() was called."""
+        pygame.mixer.music.load(AudioService.bgm)
+
+    @staticmethod
+    def bgm_pending():
+        """Marks the music as being decoded elsewhere, until then the music controls only remember what was asked."""
+        AudioService._bgm_pending = True
+
+    @staticmethod
+    def bgm_ready(*_):
+        """Marks the music as decoded, catching up on the music controls called while it was pending."""
+        AudioService._bgm_pending = False
+        AudioService._bgm_loaded = True
+        if AudioService._bgm_wanted:
+            paused = AudioService._bgm_paused
+            AudioService.start_bgm()
+            if paused:
+                AudioService.pause_bgm()
+
+    @staticmethod
+    def set_volume(volume: float):
+        """Sets music and sound effect volume without reloading anything."""
+        AudioService.volume = volume
+        for sound in AudioService._sounds.values():
+            sound.set_volume(volume)
+        # a pending track gets the volume when start_bgm() plays it
+        if pygame.mixer.get_init() and not AudioService._bgm_pending:
+            pygame.mixer.music.set_volume(volume)
+
+    @staticmethod
+    def play(name: str):
+        """Plays a preloaded effect on its reserved channel, interrupting its previous play."""
+        sound = AudioService._sounds.get(name)
+        if sound is not None:
+            AudioService._channels[name].play(sound)
+
     @staticmethod
     def start_bgm():
-        pygame.mixer.music.load("./assets/audio/8bit_bgm.mp3")
-        pygame.mixer.music.set_volume(Config.volume)
+        """Plays the background music from the start, decoding it on first use."""
+        if not AudioService.music:
+            return
+        AudioService._bgm_paused = False
+        if not AudioService._bgm_loaded:
+            if AudioService._bgm_pending:
+                AudioService._bgm_wanted = True
+                return
+            AudioService.decode_bgm()
+            AudioService._bgm_loaded = True
+        AudioService._bgm_wanted = False
+        pygame.mixer.music.set_volume(AudioService.volume)
         pygame.mixer.music.play(loops=-1)
 
     @staticmethod
     def fade_bgm(time: int=3):
+        if not AudioService.music:
+            return
+        if AudioService._bgm_pending:
+            # nothing is playing yet, so it should not start at all
+            AudioService._bgm_wanted = False
+            return
         time *= 1000
         pygame.mixer.music.fadeout(time)
 
     @staticmethod
     def pause_bgm():
+        if not AudioService.music:
+            return
+        if AudioService._bgm_pending:
+            AudioService._bgm_paused = True
+            return
         pygame.mixer.music.pause()
-    
+
     @staticmethod
     def resume_bgm():
+        if not AudioService.music:
+            return
+        if AudioService._bgm_pending:
+            AudioService._bgm_paused = False
+            return
         pygame.mixer.music.unpause()
 
     @staticmethod
     def jump():
-        jump_fx = pygame.mixer.Sound("./assets/audio/jump.mp3")
-        jump_fx.set_volume(Config.volume)
-        jump_fx.play()
+        AudioService.play("jump")
 
     @staticmethod
     def hit():
-        hit_fx = pygame.mixer.Sound("./assets/audio/hit.wav")
-        hit_fx.set_volume(Config.volume)
-        hit_fx.play()
+        AudioService.play("hit")
 
     @staticmethod
     def score():
-        score_fx = pygame.mixer.Sound("./assets/audio/score.wav")
-        score_fx.set_volume(Config.volume)
-        score_fx.play()
\ No newline at end of file
+        AudioService.play("score")
@@ -0,0 +1,185 @@
+import sys
+import json
+import time
+import pygame
+import logging
+import platform
+import statistics
+from typing import NamedTuple
+
+from .config import Config, GameState
+from .simulation import HeadlessRunner
+from .controls import InputFrame
+from .collision import sweep_collide
+from .course import CourseGenerator
+from .obstacle import Crate
+
+class Measurement(NamedTuple):
+    """Time per call of one benchmark in microseconds, the median and fastest of its repeats."""
+    median: float
+    best: float
+
+class BenchmarkSuite:
+    """
+    Times the game's hot paths and whole frames headlessly, and compares the
+    results against a saved baseline.
+
+    Each micro benchmark calls one piece of the game on a prepared headless
+    Game, enough times per repeat to run for at least Config.bench_min_time
+    seconds. The world's scroll is zeroed while they run so the scene stays
+    the same however many calls are made. The frame benchmarks step and draw
+    whole ticks with the scroll held at each of Config.bench_speeds, with the
+    player's health raised so the run cannot end. They warm up for a second
+    of game time and each repeat covers Config.bench_frame_time seconds, long
+    enough to include the occasional ground chunk and course spawn.
+
+    Methods
+    ---
+    run() -> dict
+        Runs every benchmark and returns name -> Measurement.
+    save(results: dict, path: str) -> None
+        Writes results and a description of the machine to a JSON file.
+    load(path: str) -> dict
+        Reads results written by save().
+    compare(results: dict, baseline: dict, tolerance: float=None) -> list
+        Returns (name, baseline, result) for every benchmark whose best time
+        is slower than the baseline's by more than tolerance. The best of
+        the repeats is the least disturbed by the rest of the machine.
+    """
+    def __init__(self, repeat: int=None, seed: int=0):
+        self.logger = logging.getLogger("runningman.benchmark.BenchmarkSuite")
+        self.repeat = repeat or Config.bench_repeat
+        self.runner = HeadlessRunner(seed=seed)
+        self.game = self.runner.game
+
+    @staticmethod
+    def measure(call, repeat: int, min_time: float=None) -> Measurement:
+        """Times call() in microseconds per call."""
+        min_time = min_time or Config.bench_min_time
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            number *= 2
+        times = [elapsed / number]
+        for _ in range(repeat - 1):
+            start = time.perf_counter()
+            for _ in range(number):
+                call()
+            times.append((time.perf_counter() - start) / number)
+        return Measurement(statistics.median(times) * 1e6, min(times) * 1e6)
+
+    def micro(self) -> dict:
+        """Returns name -> function for every micro benchmark."""
+        game = self.game
+        player = game.player
+        screen = game.screen
+        frames = player.sprites.num_frames("run")
+        idle = InputFrame()
+
+        # an obstacle overlapping the player, so the collision benchmark reaches the mask tests
+        contact = game.pool.acquire(Crate, game.world, player.rect.x)
+        contact.prev_x = contact.rect.x
+        collidable = pygame.sprite.Group(contact)
+
+        course = CourseGenerator(0)
+        counter = iter(range(sys.maxsize))
+
+        def setup():
+            game.setup()
+            game.apply_quality()
+
+        def pool():
+            game.pool.release(game.pool.acquire(Crate, game.world, Config.S_WIDTH))
+
+        return {
+            "sprites.parse_sprite": lambda: player.sprites.parse_sprite("run", next(counter) % frames),
+            "player.update": lambda: player.update(idle),
+            "collision.sweep": lambda: sweep_collide(player, collidable),
+            "course.chunk": course.chunk,
+            "pool.acquire_release": pool,
+            "background.update": game.background.update,
+            "background.draw": lambda: game.background.draw(screen),
+            "rear.update": game.rear.update,
+            "rear.draw": lambda: game.rear.draw(screen),
+            "trees.update": game.trees.update,
+            "trees.draw": lambda: game.trees.draw(screen),
+            "obstacles.update": game.obstacles.update,
+            "obstacles.draw": lambda: game.draw_group(game.obstacles, 0),
+            "ground.update": game.ground.update,
+            "ground.draw": lambda: game.ground.draw(screen),
+            "ground.make_chunk": game.ground.make_chunk,
+            "scoreboard.draw": lambda: game.scoreboard.draw(screen, game.atlas),
+            "hud.draw": lambda: game.hud.draw(screen, player.hp),
+            "hud.rebuild": lambda: game.hud.rebuild(player.hp),
+            "game.draw": game.draw,
+            "game.setup": setup,
+            "game.reset": game.reset,
+            }
+
+    def frames(self, speed: int) -> Measurement:
+        """Times whole ticks, stepped and drawn, with the scroll speed held at speed."""
+        game = self.game
+        game.reset()
+        game.player.hp = sys.maxsize
+
+        def frame():
+            game.world.base_scroll = -speed
+            self.runner.step()
+
+        for _ in range(Config.TICK_RATE):
+            frame()
+        return self.measure(frame, self.repeat, Config.bench_frame_time)
+
+    def run(self) -> dict:
+        results = {}
+        # let the first chunks of the course spawn before timing the scene
+        self.runner.run(Config.TICK_RATE, stop_at_game_over=False)
+        for name, call in self.micro().items():
+            # Player.update sets the scroll from its input, so zero it before each benchmark
+            self.game.world.scroll = 0
+            results[name] = self.measure(call, self.repeat)
+            self.logger.info(f"{name}: {results[name]}")
+
+        for speed in Config.bench_speeds:
+            name = f"frame.speed_{speed}"
+            results[name] = self.frames(speed)
+            if self.game.world.status is not GameState.GAME_PLAY:
+                self.logger.warning(f"{name} ended its run, the result is not comparable")
+            self.logger.info(f"{name}: {results[name]}")
+        return results
+
+    @staticmethod
+    def save(results: dict, path: str) -> None:
+        data = {
+            "machine": {
+                "python": platform.python_version(),
+                "pygame": pygame.version.ver,
+                "sdl": ".".join(map(str, pygame.get_sdl_version())),
+                "platform": platform.platform(),
+                "processor": platform.processor() or platform.machine(),
+                },
+            "unit": "us per call",
+            "results": {name: result._asdict() for name, result in results.items()},
+            }
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    @staticmethod
+    def load(path: str) -> dict:
+        with open(path) as f:
+            data = json.load(f)
+        return {name: Measurement(**result) for name, result in data["results"].items()}
+
+    @staticmethod
+    def compare(results: dict, baseline: dict, tolerance: float=None) -> list:
+        tolerance = Config.bench_tolerance if tolerance is None else tolerance
+        return [
+            (name, baseline[name], result)
+            for name, result in results.items()
+            if name in baseline and result.best > baseline[name].best * (1 + tolerance)
+            ]
@@ -0,0 +1,136 @@
+import os
+import mmap
+import json
+import struct
+import logging
+import pygame
+
+from .config import Config
+from .assets import AssetRegistry
+
+class Bundle:
+    """
+    Every startup image packed into one file as raw pixels, read through a
+    memory map.
+
+    Images are stored already scaled to their in-game size as 32-bit BGRA,
+    the byte order of the usual display format, so a Surface is built
+    straight on the mapped pixels without decoding or copying them. The
+    mapping is private, writing to a Surface never touches the file.
+
+    The file is a header, a JSON index and the pixel data, each image
+    aligned to Bundle.ALIGN bytes. The index maps each key to
+    [offset, width, height, source path] and each source path to the
+    [size, mtime] it had when bundled. Images whose source has changed since
+    are treated as not bundled, so they are loaded from the source instead.
+
+    Methods
+    ---
+    key(path: str, scale: float=1.0) -> str
+        The key of an image scaled by an already quantised scale.
+    frame_key(path: str, x: int, y: int, w: int, h: int) -> str
+        The key of an animation frame sliced from a sprite sheet.
+    surface(key: str) -> pygame.Surface or None
+        Returns a Surface over the bundled pixels, or None if not bundled.
+    build(path: str=None) -> None
+        Packs every startup image into a new bundle, default at
+        Config.bundle_path.
+    """
+    MAGIC = b"RMAB"
+    VERSION = 2
+    HEADER = struct.Struct("<4sBI")
+    ALIGN = 64
+
+    def __init__(self, path: str):
+        self.logger = logging.getLogger("runningman.bundle.Bundle")
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self._map) < Bundle.HEADER.size:
+            raise ValueError(f"{path} is not an asset bundle.")
+        magic, version, index_size = Bundle.HEADER.unpack_from(self._map)
+        if magic != Bundle.MAGIC:
+            raise ValueError(f"{path} is not an asset bundle.")
+        if version != Bundle.VERSION:
+            raise ValueError(f"{path} has unsupported bundle version {version}, rebuild it.")
+        start = Bundle.HEADER.size
+        index = json.loads(self._map[start:start + index_size])
+        self.index = index["images"]
+        # sources changed since they were bundled
+        self.stale = {source for source, stamp in index["sources"].items() if Bundle.stamp(source) != stamp}
+        self._data = memoryview(self._map)[Bundle.aligned(start + index_size):]
+        self.logger.info(f"Opened {path} with {len(self.index)} images")
+        if self.stale:
+            self.logger.warning(f"Images changed since {path} was built are loaded from source, rebuild it: {sorted(self.stale)}")
+
+    @staticmethod
+    def aligned(n: int) -> int:
+        return -(-n // Bundle.ALIGN) * Bundle.ALIGN
+
+    @staticmethod
+    def stamp(path: str) -> list:
+        """Returns [size, mtime in nanoseconds] of a source file, or None if it is missing."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime_ns]
+
+    @staticmethod
+    def key(path: str, scale: float=1.0) -> str:
+        return f"{path}@{scale}"
+
+    @staticmethod
+    def frame_key(path: str, x: int, y: int, w: int, h: int) -> str:
+        return f"{path}#{x},{y},{w},{h}"
+
+    def __contains__(self, key: str) -> bool:
+        entry = self.index.get(key)
+        return entry is not None and entry[3] not in self.stale
+
+    def surface(self, key: str):
+        if key not in self:
+            return None
+        offset, width, height, _ = self.index[key]
+        return pygame.image.frombuffer(self._data[offset:offset + width * height * 4], (width, height), "BGRA")
+
+    @staticmethod
+    def build(path: str=None) -> None:
+        # imported here, the game imports the registry that opens bundles
+        from .game_service import Game
+        from .visuals import PlayerSprites
+
+        path = path or Config.bundle_path
+        # key -> (source path, image)
+        images = {}
+        for image_path, _, scale in Game.images():
+            scale = AssetRegistry.quantise(scale) if scale else 1.0
+            images[Bundle.key(image_path, scale)] = (image_path, AssetRegistry.decode(image_path, scale))
+        with open(PlayerSprites.sheet.replace("png", "json")) as f:
+            metadata = json.load(f)
+        sheet = pygame.image.load(PlayerSprites.sheet)
+        for data in metadata.values():
+            for sprite in data["sprites"]:
+                frame = PlayerSprites.slice(sheet, **sprite)
+                # bake the colour key into per-pixel alpha, BGRA has no colour key
+                transparent = pygame.Surface(frame.get_size(), pygame.SRCALPHA)
+                transparent.blit(frame, (0, 0))
+                images[Bundle.frame_key(PlayerSprites.sheet, **sprite)] = (PlayerSprites.sheet, transparent)
+
+        index, sources, blobs, offset = {}, {}, [], 0
+        for key, (source, image) in images.items():
+            pixels = pygame.image.tobytes(image, "BGRA")
+            index[key] = [offset, image.get_width(), image.get_height(), source]
+            sources[source] = Bundle.stamp(source)
+            padding = Bundle.aligned(len(pixels)) - len(pixels)
+            blobs.append(pixels + bytes(padding))
+            offset += len(pixels) + padding
+
+        index_bytes = json.dumps({"sources": sources, "images": index}).encode()
+        header_size = Bundle.HEADER.size + len(index_bytes)
+        with open(path, "wb") as f:
+            f.write(Bundle.HEADER.pack(Bundle.MAGIC, Bundle.VERSION, len(index_bytes)))
+            f.write(index_bytes)
+            f.write(bytes(Bundle.aligned(header_size) - header_size))
+            for blob in blobs:
+                f.write(blob)
+        logging.getLogger("runningman.bundle").info(f"Bundled {len(index)} images into {path}, {offset} bytes")
@@ -0,0 +1,47 @@
+import math
+import pygame
+
+from .config import Config
+
+def swept_bounds(rect: pygame.Rect, dx: float, dy: float) -> pygame.Rect:
+    """Returns the rect covering rect over a tick in which it moved by (dx, dy) to its current position."""
+    return rect.union(rect.move(round(-dx), round(-dy)))
+
+def sweep_collide(player, obstacles) -> list:
+    """
+    Returns every obstacle the player touched during the last tick, each once.
+
+    The player and obstacles are tested over the whole movement of the tick
+    rather than only at its end, so fast obstacles cannot pass through the
+    player between ticks. The swept rects are compared first, and only
+    obstacles whose swept rects overlap the player's are mask tested, at
+    sub-steps of at most Config.collision_step pixels of relative motion.
+
+    The player needs rect, mask and prev_pos, each obstacle rect, mask and
+    prev_x, the positions at the start of the tick.
+    """
+    p_end = player.rect
+    p_dx = p_end.x - player.prev_pos.x
+    p_dy = p_end.y - player.prev_pos.y
+    p_swept = swept_bounds(p_end, p_dx, p_dy)
+
+    contacts = []
+    for obstacle in obstacles:
+        o_end = obstacle.rect
+        o_dx = o_end.x - obstacle.prev_x
+        if not p_swept.colliderect(swept_bounds(o_end, o_dx, 0)):
+            continue
+
+        # the start of the tick was tested as the end of the previous one
+        rel_dx, rel_dy = o_dx - p_dx, -p_dy
+        steps = max(1, math.ceil(max(abs(rel_dx), abs(rel_dy)) / Config.collision_step))
+        for step in range(1, steps + 1):
+            back = 1 - step / steps
+            p_rect = p_end.move(round(-p_dx * back), round(-p_dy * back))
+            o_rect = o_end.move(round(-o_dx * back), 0)
+            if p_rect.colliderect(o_rect) and player.mask.overlap(
+                    obstacle.mask, (o_rect.x - p_rect.x, o_rect.y - p_rect.y)
+                ):
+                contacts.append(obstacle)
+                break
+    return contacts
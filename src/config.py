@@ -8,31 +8,102 @@ class GameState(Enum):
 
 class Config:
     """Global game settings, configure as required."""
-    # frame rate
+    # frame rate cap for rendering
     FPS = 30
+    # fixed simulation rate, game feel is tuned for 30 ticks per second
+    TICK_RATE = 30
+    # longest frame the simulation will catch up on, in seconds
+    max_frame_time = 0.25
     # screen dimensions
     S_WIDTH = 960 
     S_HEIGHT = 540
+    # window size, the game is drawn at S_WIDTH x S_HEIGHT and scaled by the
+    # largest whole multiple that fits, letterboxed, once per frame. This is
+    # for driving larger displays, it adds a scale and saves no drawing. None
+    # opens a window the size of the game
+    window_size = None
+    # let SDL scale to the largest whole multiple that fits the desktop on the
+    # GPU instead, window_size is then ignored
+    window_scaled = False
+    # draw the background layers at their art resolution and scale them up
+    # once per frame, instead of blending them at full size
+    background_native = True
     # easy collision check
     GROUND_HEIGHT = S_HEIGHT - 15
     # world effects
     GRAVITY = 1.5
     FRICTION = 1
+    # asset cache: scale factors are rounded to this step, randomly scaled
+    # scenery variants kept in LRU
+    asset_scale_step = 0.05
+    asset_cache_size = 64
+    # images with at most this fraction of pixels partially transparent are
+    # drawn with a colour key instead of per-pixel alpha, see AssetRegistry
+    alpha_partial_limit = 0.005
+    # pre-scaled raw images built with main.py --build-bundle, used if present
+    bundle_path = "./assets/bundle.rmab"
+    # threads decoding assets behind the loading screen at startup
+    loader_workers = 4
+    # instances of each obstacle type built ahead of time
+    pool_prewarm = 2
+    # largest relative movement in pixels between swept collision mask tests
+    collision_step = 4
     # audio volume
     volume = 0.1
-    # background scroll speed
-    BG_SCROLL = -1
-    BASE_SCROLL = -5
-    scroll = -5
-    # game status
-    status = GameState.GAME_PLAY
+    # mixer output, a smaller buffer lowers sound effect latency
+    audio_frequency = 44100
+    audio_buffer = 512
+    # background scroll speed of each layer, farthest first
+    BG_LAYER_SPEEDS = (0, -0.5, -0.5, -1, -1)
+    # scroll speed of the ground and obstacles at the start of a run, see World
+    START_SCROLL = -5
+    # seconds of play between each increase in scroll speed
+    speed_up_interval = 5
+    # obstacle course: length of each generated chunk in pixels, whether the
+    # next chunk is prepared on a background thread, and the distance over
+    # which the course ramps up to full difficulty
+    course_chunk = 2 * S_WIDTH
+    course_prefetch = True
+    course_ramp = 30000
+    # only present the changed regions of the screen instead of flipping every frame
+    dirty_rendering = False
+    # quality level to start at, 0 draws everything, see QualityGovernor.levels
+    quality_level = 0
+    # shed and restore optional visual work to keep frames within the FPS budget
+    quality_adaptive = True
+    # frames per quality decision, and the fraction of the FPS budget the 90th
+    # percentile frame time must exceed to shed a level or stay under to restore one
+    quality_window = 60
+    quality_shed = 0.9
+    quality_restore = 0.5
+    # frame profiler: rolling window size and JSON dump written at exit
+    profiler = True
+    profiler_samples = 300
+    profile_path = "logs/profile.json"
+    # benchmark suite: repeats of each benchmark, shortest time in seconds of a
+    # repeat and of a whole frame benchmark repeat, scroll speeds of the frame
+    # benchmarks, results file, and the slowdown against a baseline counted as
+    # a regression
+    bench_repeat = 7
+    bench_min_time = 0.02
+    bench_frame_time = 0.25
+    bench_speeds = (5, 10, 20)
+    bench_path = "logs/benchmark.json"
+    bench_tolerance = 0.2
+    # run history database, default is history.db in the user data directory
+    history_path = None
     # toggle logging
     log = True
     log_level = "DEBUG"
+    # also log the per-tick debug messages, costly even when rate limited
+    log_hot = False
+    # seconds between records let through from each per-tick call site
+    log_rate_limit = 1.0
 
     # key bindings
     left_keybind = K_a
     right_keybind = K_d
     up_keybind = K_w
     pause_keybind = [K_e]
-    exit_keybind = [K_q]
\ No newline at end of file
+    exit_keybind = [K_q]
+    overlay_keybind = [K_p]
\ No newline at end of file
@@ -0,0 +1,62 @@
+import pygame
+from typing import NamedTuple, Sequence
+
+from .config import Config
+
+class InputFrame(NamedTuple):
+    """
+    The player's input for a single tick.
+
+    left, right and jump are held keys, pause, exit and overlay are key
+    presses that happened during the tick.
+    """
+    left: bool = False
+    right: bool = False
+    jump: bool = False
+    pause: bool = False
+    exit: bool = False
+    overlay: bool = False
+
+class KeyboardInput:
+    """Reads input from the pygame event queue and keyboard state."""
+    def poll(self) -> InputFrame:
+        pause = exit = overlay = False
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                exit = True
+            elif event.type == pygame.KEYDOWN:
+                if event.key in Config.exit_keybind:
+                    exit = True
+                elif event.key in Config.pause_keybind:
+                    pause = True
+                elif event.key in Config.overlay_keybind:
+                    overlay = True
+
+        keys = pygame.key.get_pressed()
+        return InputFrame(
+            left=keys[Config.left_keybind],
+            right=keys[Config.right_keybind],
+            jump=keys[Config.up_keybind],
+            pause=pause,
+            exit=exit,
+            overlay=overlay
+            )
+
+class NullInput:
+    """Never presses anything."""
+    def poll(self) -> InputFrame:
+        return InputFrame()
+
+class ScriptedInput:
+    """Plays back a fixed sequence of InputFrames, then presses nothing."""
+    def __init__(self, frames: Sequence[InputFrame]):
+        self.frames = frames
+        self.tick = 0
+
+    def poll(self) -> InputFrame:
+        if self.tick < len(self.frames):
+            frame = self.frames[self.tick]
+        else:
+            frame = InputFrame()
+        self.tick += 1
+        return frame
@@ -0,0 +1,204 @@
+import random
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from .config import Config
+from .assets import AssetRegistry
+from .obstacle import Logs, Crate, Box, Signboard, Scarecrow, Statue
+from .player import Player
+from .visuals import Tree
+
+# chance of each obstacle type at the start of a run and at full difficulty
+OBSTACLE_WEIGHTS = (
+    (Statue, 5, 15),
+    (Signboard, 5, 15),
+    (Scarecrow, 20, 25),
+    (Crate, 25, 15),
+    (Box, 25, 10),
+    (Logs, 20, 20),
+    )
+# extra space in pixels added to the shortest safe gap between obstacles,
+# drawn between these bounds at the start of a run and at full difficulty
+GAP_SLACK_START = (0, 200)
+GAP_SLACK_END = (0, 80)
+TREE_GAPS = range(800, 1500, 100)
+# room a running player takes up
+PLAYER_WIDTH = 40
+
+def jump_arc() -> tuple:
+    """Returns the ticks a jump from the ground stays in the air and the height it peaks at."""
+    velocity, height, ticks, apex = Player.jump_velocity, 0.0, 0, 0.0
+    while True:
+        velocity = min(velocity + Config.GRAVITY, Player.terminal_velocity)
+        height -= velocity
+        ticks += 1
+        if height <= 0:
+            return ticks, apex
+        apex = max(apex, height)
+
+AIRTIME, APEX = jump_arc()
+
+def top_speed(distance: int) -> int:
+    """
+    Returns the fastest the course can be scrolling once the camera has
+    travelled distance pixels.
+
+    The game speeds up every Config.speed_up_interval seconds, so the player
+    reaches a point soonest in speed terms when covering the least ground
+    per tick, which is holding left the whole run.
+    """
+    ticks = Config.speed_up_interval * Config.TICK_RATE
+    speed, covered = -Config.START_SCROLL, 0
+    while True:
+        covered += ticks * max(1, speed - Player.run_speed)
+        if covered > distance:
+            return speed
+        speed += 1
+
+class Chunk(NamedTuple):
+    """
+    A stretch of course from start to end, in pixels from where the run began.
+
+    obstacles holds (x, obstacle type) pairs and trees (x, Surface) pairs,
+    x being the left edge, both in increasing x.
+    """
+    start: int
+    end: int
+    obstacles: list
+    trees: list
+
+class CourseGenerator:
+    """
+    Lays out obstacles and trees chunk by chunk from a seed.
+
+    The course depends only on the seed, so a run is reproducible however
+    far ahead it is generated. Difficulty ramps from 0 to 1 over
+    Config.course_ramp pixels, shrinking the gaps between obstacles and
+    favouring the taller and wider ones. However hard the course gets,
+    every obstacle can be jumped and every gap is long enough to land in
+    and jump again, at the top speed the game can reach by that point.
+
+    Methods
+    ---
+    chunk() -> Chunk
+        Generates the next Config.course_chunk pixels of course.
+    """
+    def __init__(self, seed: int):
+        self.logger = logging.getLogger("runningman.course.CourseGenerator")
+        self.rng = random.Random(seed)
+        self.sizes = {cls: cls.size() for cls, *_ in OBSTACLE_WEIGHTS}
+        # chunk() may run on the prefetch thread, decode and convert the tree
+        # sources here so it only has to flip and scale them
+        for path in Tree.paths:
+            AssetRegistry.source(path)
+        self.start = 0
+        # the first obstacle enters from the right edge of the screen
+        self.next_obstacle = Config.S_WIDTH
+        # the next tree's position and image, chosen before the gap after it
+        self.next_tree = None
+        self.tree_image = None
+
+    @staticmethod
+    def difficulty(x: int) -> float:
+        return min(1.0, x / Config.course_ramp)
+
+    @staticmethod
+    def lerp(start: float, end: float, t: float) -> float:
+        return start + (end - start) * t
+
+    def jumpable(self, cls: type, speed: int) -> bool:
+        """True if a player running right can clear the obstacle at this speed."""
+        width, height = self.sizes[cls]
+        reach = (speed + 2 * Player.run_speed) * AIRTIME
+        return height < APEX and width + PLAYER_WIDTH <= reach
+
+    def pick(self, x: int, speed: int) -> type:
+        difficulty = self.difficulty(x)
+        types, weights = [], []
+        for cls, start, end in OBSTACLE_WEIGHTS:
+            if self.jumpable(cls, speed):
+                types.append(cls)
+                weights.append(self.lerp(start, end, difficulty))
+        return self.rng.choices(types, weights)[0]
+
+    def gap(self, x: int, speed: int) -> int:
+        """Returns the space to leave after an obstacle ending at x."""
+        difficulty = self.difficulty(x)
+        low = self.lerp(GAP_SLACK_START[0], GAP_SLACK_END[0], difficulty)
+        high = self.lerp(GAP_SLACK_START[1], GAP_SLACK_END[1], difficulty)
+        # enough ground to land after one obstacle and take off for the next
+        return speed * AIRTIME + PLAYER_WIDTH + int(self.rng.uniform(low, high))
+
+    def chunk(self) -> Chunk:
+        start, end = self.start, self.start + Config.course_chunk
+        obstacles = []
+        while self.next_obstacle < end:
+            x = self.next_obstacle
+            cls = self.pick(x, top_speed(x))
+            obstacles.append((x, cls))
+            right = x + self.sizes[cls][0]
+            self.next_obstacle = right + self.gap(right, top_speed(right))
+
+        trees = []
+        if self.next_tree is None:
+            # the first tree is already in view
+            self.tree_image = Tree.image(self.rng)
+            self.next_tree = self.rng.choice([400, 450, 500]) - self.tree_image.get_width() // 2
+        while self.next_tree < end:
+            trees.append((self.next_tree, self.tree_image))
+            self.next_tree += self.tree_image.get_width() + self.rng.choice(TREE_GAPS)
+            self.tree_image = Tree.image(self.rng)
+
+        self.start = end
+        self.logger.debug("Chunk %d to %d: %d obstacles, %d trees", start, end, len(obstacles), len(trees))
+        return Chunk(start, end, obstacles, trees)
+
+# chunks for every course are prepared on one shared background thread
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="course")
+
+class Course:
+    """
+    Hands out the obstacles and trees of a generated course as the camera
+    reaches them.
+
+    The chunk after the one being played is generated on a background
+    thread, together with the tree images it uses, so spawning never waits
+    on layout or image scaling. Chunks are still generated one after
+    another from the same seed, so the course is identical with or without
+    prefetching.
+
+    Methods
+    ---
+    take(until: int) -> tuple
+        Returns the (x, obstacle type) and (x, Surface) placements with x up
+        to until that have not been taken yet.
+    """
+    def __init__(self, seed: int, prefetch: bool=None):
+        self.logger = logging.getLogger("runningman.course.Course")
+        self.generator = CourseGenerator(seed)
+        self.prefetch = Config.course_prefetch if prefetch is None else prefetch
+        self.obstacles = deque()
+        self.trees = deque()
+        self.end = 0
+        self._next = None
+        self._extend(self.generator.chunk())
+
+    def _extend(self, chunk: Chunk) -> None:
+        self.obstacles.extend(chunk.obstacles)
+        self.trees.extend(chunk.trees)
+        self.end = chunk.end
+        if self.prefetch:
+            self._next = _prefetcher.submit(self.generator.chunk)
+
+    def take(self, until: int) -> tuple:
+        while self.end <= until:
+            self._extend(self._next.result() if self._next is not None else self.generator.chunk())
+        obstacles = []
+        while self.obstacles and self.obstacles[0][0] <= until:
+            obstacles.append(self.obstacles.popleft())
+        trees = []
+        while self.trees and self.trees[0][0] <= until:
+            trees.append(self.trees.popleft())
+        return obstacles, trees
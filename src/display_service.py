@@ -0,0 +1,106 @@
+import pygame
+import logging
+
+from .config import Config
+
+class DisplayService:
+    """
+    Owns the window and presents each frame to it.
+
+    With Config.dirty_rendering off every frame is flipped in full. With it
+    on, only the regions passed to mark() are sent to the window, and a
+    frame in which nothing was marked is not presented at all. Call
+    invalidate() when the whole screen changed.
+
+    The frame is always drawn at size, the game's own resolution, while the
+    window can be any size. A window of a different size gets the frame
+    scaled once per frame as it is presented, by SDL on the GPU when scaled
+    is set or otherwise on the CPU, to the largest whole multiple of size
+    that fits, centred with black borders. A window smaller than size gets
+    the largest fit of the same aspect ratio instead. Scaling presents the
+    whole frame, so dirty rendering only skips frames in which nothing
+    changed. Scaling adds work rather than saving any, the frame is drawn at
+    full size whatever the window.
+
+    An offscreen display draws to a Surface of its own that is never
+    presented, so any number of them can exist alongside the window.
+
+    Methods
+    ---
+    mark(*rects: pygame.Rect) -> None
+        Records regions of the screen that changed this frame.
+    invalidate() -> None
+        Records that the whole screen changed this frame.
+    present() -> None
+        Sends the changed regions to the window and clears the record.
+    require_mode() -> None
+        Sets a minimal display mode if none is set, so images can be converted.
+    """
+    def __init__(self, size: tuple=(Config.S_WIDTH, Config.S_HEIGHT), dirty_rendering: bool=None, offscreen: bool=False, window: tuple=None, scaled: bool=None):
+        self.logger = logging.getLogger("runningman.display_service.DisplayService")
+        self.offscreen = offscreen
+        # the window surface and the area of it the frame is scaled to, when scaling on the CPU
+        self.window = None
+        self.view = None
+        size = tuple(size)
+        window = tuple(window or Config.window_size or size)
+        scaled = Config.window_scaled if scaled is None else scaled
+        if offscreen:
+            DisplayService.require_mode()
+            self.screen = pygame.Surface(size)
+        elif scaled:
+            # SDL picks the largest whole multiple of size that fits the desktop
+            self.screen = pygame.display.set_mode(size, pygame.SCALED)
+        elif window != size:
+            self.window = pygame.display.set_mode(window)
+            self.window.fill((0, 0, 0))
+            self.view = self.window.subsurface(DisplayService.fit(size, window))
+            self.screen = pygame.Surface(size).convert()
+        else:
+            self.screen = pygame.display.set_mode(size)
+        if not offscreen:
+            pygame.display.set_caption("Running Man")
+        self.dirty_rendering = Config.dirty_rendering if dirty_rendering is None else dirty_rendering
+        self._rects = []
+        self._full = True
+        self.logger.debug(
+            f"DisplayService initialised, size={size}, window={window}, scaled={scaled}, "
+            f"dirty_rendering={self.dirty_rendering}, offscreen={offscreen}"
+            )
+
+    @staticmethod
+    def require_mode() -> None:
+        # convert() needs a display mode set, a minimal one will do
+        if pygame.display.get_surface() is None:
+            pygame.display.set_mode((1, 1))
+
+    @staticmethod
+    def fit(size: tuple, window: tuple) -> pygame.Rect:
+        """Returns the area of window the frame is scaled to, centred."""
+        factor = min(window[0] // size[0], window[1] // size[1])
+        if factor >= 1:
+            scaled = (size[0] * factor, size[1] * factor)
+        else:
+            ratio = min(window[0] / size[0], window[1] / size[1])
+            scaled = (max(1, int(size[0] * ratio)), max(1, int(size[1] * ratio)))
+        return pygame.Rect((0, 0), scaled).move((window[0] - scaled[0]) // 2, (window[1] - scaled[1]) // 2)
+
+    def mark(self, *rects: pygame.Rect) -> None:
+        self._rects.extend(rect for rect in rects if rect)
+
+    def invalidate(self) -> None:
+        self._full = True
+
+    def present(self) -> None:
+        if self.offscreen:
+            pass
+        elif self.window is not None:
+            if not self.dirty_rendering or self._full or self._rects:
+                pygame.transform.scale(self.screen, self.view.get_size(), self.view)
+                pygame.display.flip()
+        elif not self.dirty_rendering or self._full:
+            pygame.display.flip()
+        elif self._rects:
+            pygame.display.update(self._rects)
+        self._rects.clear()
+        self._full = False
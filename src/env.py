@@ -0,0 +1,220 @@
+import logging
+import multiprocessing
+import numpy as np
+from typing import NamedTuple
+
+from .config import Config, GameState
+from .controls import InputFrame
+from .obstacle import Obstacle
+from .replay import unpack_input
+from .simulation import HeadlessRunner
+
+# an action is the left, right and jump bits of a packed replay input, 0 to 7
+NUM_ACTIONS = 8
+# obstacles ahead of the player described in each observation
+OBSTACLES_AHEAD = 3
+OBSTACLE_TYPES = tuple(Obstacle.__subclasses__())
+# player x, y, velocity x, y, hp, in air, scroll speed, then type, distance,
+# width and height of each obstacle ahead
+OBS_SIZE = 7 + 4 * OBSTACLES_AHEAD
+
+class ActionInput:
+    """Presses whatever the environment was last told to, set through frame."""
+    def __init__(self):
+        self.frame = InputFrame()
+
+    def poll(self) -> InputFrame:
+        return self.frame
+
+class StepResult(NamedTuple):
+    """
+    The outcome of stepping a batch, one row per game.
+
+    A game whose done is True has already been reset, its obs row is the
+    first observation of the next run.
+    """
+    obs: np.ndarray
+    reward: np.ndarray
+    done: np.ndarray
+
+class BatchEnv:
+    """
+    Steps a batch of headless games in lockstep for automated players.
+
+    Game i is seeded with seed + i on its first run and seed + i + stride * k
+    on its k-th reset, stride defaulting to n, so a batch with the same seed
+    and actions is reproducible. Nothing is rendered.
+
+    Reward is the score gained in the step minus the hit points lost.
+
+    Methods
+    ---
+    reset() -> np.ndarray
+        Restarts every game and returns an (n, OBS_SIZE) float32 array of
+        observations.
+    step(actions) -> StepResult
+        Applies one action in range(NUM_ACTIONS) per game and advances every
+        game by one tick, resetting those that ended.
+    close() -> None
+        Releases the games.
+    """
+    def __init__(self, n: int, seed: int=0, stride: int=None):
+        self.logger = logging.getLogger("runningman.env.BatchEnv")
+        self.n = n
+        self.seed = seed
+        self.stride = stride or n
+        self.inputs = [ActionInput() for _ in range(n)]
+        self.runners = [
+            HeadlessRunner(seed=seed + i, controls=self.inputs[i], render=False)
+            for i in range(n)
+            ]
+        for runner in self.runners:
+            runner.game.profiler.enabled = False
+        self.episodes = np.zeros(n, dtype=np.int64)
+        self._obs = np.zeros((n, OBS_SIZE), dtype=np.float32)
+        self._scores = np.zeros(n, dtype=np.int64)
+        self._hp = np.zeros(n, dtype=np.int64)
+        self.logger.info(f"BatchEnv of {n} games initialised, seed {seed}")
+
+    def reset(self) -> np.ndarray:
+        for i in range(self.n):
+            self._reset_game(i)
+        return self._obs.copy()
+
+    def step(self, actions) -> StepResult:
+        actions = np.asarray(actions)
+        if actions.shape != (self.n,):
+            raise ValueError(f"expected {self.n} actions, got shape {actions.shape}")
+        reward = np.zeros(self.n, dtype=np.float32)
+        done = np.zeros(self.n, dtype=bool)
+        for i, runner in enumerate(self.runners):
+            game = runner.game
+            self.inputs[i].frame = unpack_input(int(actions[i]) & 0b111)
+            game.step()
+            score, hp = game.scoreboard.score, game.player.hp
+            reward[i] = (score - self._scores[i]) - (self._hp[i] - hp)
+            self._scores[i], self._hp[i] = score, hp
+            if game.world.status is GameState.GAME_END:
+                done[i] = True
+                self.episodes[i] += 1
+                self._reset_game(i)
+            else:
+                self._observe(i)
+        return StepResult(self._obs.copy(), reward, done)
+
+    def close(self) -> None:
+        self.runners.clear()
+
+    def _reset_game(self, i: int) -> None:
+        game = self.runners[i].game
+        game.rng.seed(self.seed + i + self.stride * int(self.episodes[i]))
+        game.reset()
+        self._scores[i] = game.scoreboard.score
+        self._hp[i] = game.player.hp
+        self._observe(i)
+
+    def _observe(self, i: int) -> None:
+        game = self.runners[i].game
+        player = game.player
+        row = self._obs[i]
+        row[:7] = (
+            player.rect.x,
+            player.rect.y,
+            player.velocity.x,
+            player.velocity.y,
+            player.hp,
+            player.in_air,
+            -game.world.scroll,
+            )
+        ahead = sorted(
+            (obstacle for obstacle in game.obstacles if obstacle.rect.right >= player.rect.left),
+            key=lambda obstacle: obstacle.rect.x
+            )[:OBSTACLES_AHEAD]
+        for k in range(OBSTACLES_AHEAD):
+            base = 7 + 4 * k
+            if k < len(ahead):
+                rect = ahead[k].rect
+                row[base:base + 4] = (
+                    OBSTACLE_TYPES.index(type(ahead[k])),
+                    rect.left - player.rect.right,
+                    rect.width,
+                    rect.height,
+                    )
+            else:
+                row[base:base + 4] = (-1, Config.S_WIDTH, 0, 0)
+
+def _worker(pipe, n: int, seed: int, stride: int) -> None:
+    """Runs a BatchEnv in a child process, serving commands sent down the pipe."""
+    env = BatchEnv(n, seed, stride)
+    while True:
+        command, data = pipe.recv()
+        if command == "step":
+            pipe.send(env.step(data))
+        elif command == "reset":
+            pipe.send(env.reset())
+        elif command == "close":
+            env.close()
+            pipe.close()
+            return
+
+class ShardedBatchEnv:
+    """
+    A BatchEnv split into shards stepped in parallel on a process pool.
+
+    Game i is seeded as it would be in BatchEnv(n, seed), whatever the number
+    of workers, so the results do not depend on how the batch is sharded.
+
+    Methods
+    ---
+    reset() -> np.ndarray
+    step(actions) -> StepResult
+    close() -> None
+        Same as BatchEnv, close() also stops the worker processes.
+    """
+    def __init__(self, n: int, workers: int=None, seed: int=0):
+        self.logger = logging.getLogger("runningman.env.ShardedBatchEnv")
+        workers = min(n, workers or multiprocessing.cpu_count())
+        self.n = n
+        # each worker gets a contiguous slice of the batch
+        sizes = [n // workers + (w < n % workers) for w in range(workers)]
+        self.bounds = np.cumsum([0] + sizes)
+        context = multiprocessing.get_context("spawn")
+        self.pipes = []
+        self.processes = []
+        for w in range(workers):
+            parent, child = context.Pipe()
+            # offset the shard's seeds by its start and stride its resets by the
+            # whole batch, so its games are seeded as in one BatchEnv
+            process = context.Process(
+                target=_worker,
+                args=(child, sizes[w], seed + int(self.bounds[w]), n),
+                daemon=True
+                )
+            process.start()
+            child.close()
+            self.pipes.append(parent)
+            self.processes.append(process)
+        self.logger.info(f"ShardedBatchEnv of {n} games on {workers} workers initialised, seed {seed}")
+
+    def reset(self) -> np.ndarray:
+        for pipe in self.pipes:
+            pipe.send(("reset", None))
+        return np.concatenate([pipe.recv() for pipe in self.pipes])
+
+    def step(self, actions) -> StepResult:
+        actions = np.asarray(actions)
+        if actions.shape != (self.n,):
+            raise ValueError(f"expected {self.n} actions, got shape {actions.shape}")
+        for w, pipe in enumerate(self.pipes):
+            pipe.send(("step", actions[self.bounds[w]:self.bounds[w + 1]]))
+        results = [pipe.recv() for pipe in self.pipes]
+        return StepResult(*(np.concatenate(field) for field in zip(*results)))
+
+    def close(self) -> None:
+        for pipe in self.pipes:
+            pipe.send(("close", None))
+            pipe.close()
+        for process in self.processes:
+            process.join()
+        self.pipes.clear()
+        self.processes.clear()
@@ -1,147 +1,257 @@
 import pygame
+import time
 import random
 import logging
+from functools import partial
+from typing import Optional
 
 from .config import Config, GameState
 from .player import Player
 from .obstacle import *
 from .audio_service import AudioService
-from .visuals import Tile, Grass, Bush, Tree, Background
-from .utils import Scoreboard, Stopwatch, HealthBar
+from .visuals import GroundStrip, SceneryLayer, Bush, Tree, Heart, PlayerSprites, Background
+from .utils import Scoreboard, Stopwatch, HealthBar, SimulatedClock
+from .hud import GlyphAtlas, HUD
+from .controls import InputFrame, KeyboardInput
+from .profiler import FrameProfiler
+from .display_service import DisplayService
+from .pool import SpritePool
+from .collision import sweep_collide
+from .world import World
+from .course import Course
+from .assets import AssetRegistry
+from .history import RunRecord
+from .quality import QualityGovernor
+from . import logging_service
 
 class Game:
-    def __init__(self):
+    """
+    Owns the sprites, HUD and rules of a single run.
+
+    Parameters
+    ---
+    seed: int, optional
+        Seeds the game's random number generator, default is a random seed.
+    clock: optional
+        Time source with time() and get_ticks(), default is a SimulatedClock
+        the game advances by one tick each step, so game time depends only on
+        the ticks simulated.
+    controls: optional
+        Input source with poll() -> InputFrame, default reads the keyboard.
+    offscreen: bool
+        Renders to a Surface of its own instead of the window, so several
+        games can run in one process, default is False.
+    display: DisplayService, optional
+        Display to draw to, default is a new one. Ignores offscreen if given.
+    renders: bool
+        False for a game that is only ever stepped, never drawn, which then
+        has no display, HUD or background, default is True.
+    history: RunHistory, optional
+        Records every finished run and supplies the starting high score,
+        default is to keep no history.
+    """
+    def __init__(self, seed: Optional[int]=None, clock=None, controls=None, offscreen: bool=False, display=None, history=None, renders: bool=True):
         # set up display
         self.logger = logging.getLogger("runningman.game_service.Game")
-        self.screen = pygame.display.set_mode((Config.S_WIDTH, Config.S_HEIGHT))
-        pygame.display.set_caption("Running Man")
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.history = history
+        self.tick_clock = clock is None
+        self.clock = SimulatedClock() if clock is None else clock
+        self.world = World()
+        self.controls = controls if controls is not None else KeyboardInput()
+        self.input = InputFrame()
+        self.profiler = FrameProfiler()
+        self.renders = renders
+        if renders:
+            self.display = display if display is not None else DisplayService(offscreen=offscreen)
+            self.screen = self.display.screen
+            self.background = Background()
+            # every level's strips are composited now, so a quality change only swaps them
+            self.background.prepare(level.background for level in QualityGovernor.levels)
+        else:
+            DisplayService.require_mode()
+            self.display = self.screen = self.background = None
+        self.pool = SpritePool()
+        for obstacle_type in Obstacle.__subclasses__():
+            self.pool.prewarm(obstacle_type, Config.pool_prewarm, self.world)
         self.setup()
 
         # initialise objects
-        self.player = Player()
+        self.player = Player(self.world, clock=self.clock)
         self.display_font = pygame.font.Font("./assets/font/monogram.ttf", 25)
         self.health = HealthBar()
-        self.scoreboard = Scoreboard()
-        self.timer = Stopwatch()
+        self.scoreboard = Scoreboard(history.best if history is not None else 0)
+        self.timer = Stopwatch(self.clock)
+        self.atlas = GlyphAtlas(self.display_font)
+        self.hud = HUD(self.world, self.scoreboard, self.timer, self.health, self.atlas) if renders else None
+        self.pause_banner = self.atlas.render("GAME PAUSED")
+        self.quality = QualityGovernor()
+        self.apply_quality()
 
         self.running = True
         self.paused = False
+        self._pause_drawn = False
+        self._death_scene = None
+        self._player_drawn = None
+        self._accumulator = 0.0
         self.speed_up_count = 0
+        # ticks stepped this session across resets, and the tick the first run ended on
+        self.ticks = 0
+        self.first_game_over = None
 
+        AudioService.load()
         AudioService.start_bgm()
         self.timer.start()
         self.logger.info("Game initialised")
 
+    @staticmethod
+    def images() -> list:
+        """Returns (path, alpha, scale) for every image a game loads at startup."""
+        images = [(path, True, Background.layer_scale()) for path in Background.paths]
+        images += [(cls.path, True, cls.scale) for cls in Obstacle.__subclasses__()]
+        images += [(path, True, 1.0) for path in GroundStrip.grass_paths + Bush.paths + Tree.paths]
+        images += [
+            (GroundStrip.tile_path, False, 1.0),
+            (Heart.path, True, 1.0),
+            (PlayerSprites.sheet, False, 1.0),
+            ]
+        return images
+
+    @staticmethod
+    def preload(loader) -> None:
+        """
+        Queues the images and sounds a game needs on an AssetLoader, so
+        constructing one afterwards finds them already cached. Images in
+        the asset bundle are skipped, it maps them in instantly.
+
+        The music is queued as optional and starts playing once decoded.
+        """
+        bundle = AssetRegistry.bundle()
+        for path, alpha, scale in Game.images():
+            if bundle is not None and bundle.key(path, AssetRegistry.quantise(scale)) in bundle:
+                continue
+            loader.submit(AssetRegistry.decode, path, scale, then=partial(AssetRegistry.adopt, path, alpha, scale))
+
+        if pygame.mixer.get_init():
+            for name, path in AudioService.effects.items():
+                loader.submit(pygame.mixer.Sound, path, then=partial(AudioService.adopt_sound, name))
+            if AudioService.music:
+                AudioService.bgm_pending()
+                loader.submit(AudioService.decode_bgm, then=AudioService.bgm_ready, required=False)
+
     def setup(self):
         self.logger.info("Game.setup start")
-        bg1 = Background(0, 0)
-        bg2 = Background(Config.S_WIDTH, 0)
-        self.backgrounds = [bg1, bg2]
-
-        self.rear = pygame.sprite.Group()
-        self.fore = pygame.sprite.Group()
-        self.ground = pygame.sprite.Group()
-        self.trees = pygame.sprite.Group()
+        if self.background is not None:
+            self.background.reset()
+
+        self.rear = SceneryLayer(self.world, wrap=True)
+        self.trees = SceneryLayer(self.world)
         self.obstacles = pygame.sprite.Group()
+        self.ground = GroundStrip(self.world, self.rng)
 
-        tile = Tile()
-        for i in range(80):
-            tile.rect.topleft = (i * tile.width * 0.8, Config.GROUND_HEIGHT)
-            next_tile = Tile()
-            next_tile.prev = tile
-            self.ground.add(tile)
-            tile = next_tile
-        
         for i in range(8):
-            bush = Bush()
-            bush.rect.bottomleft = (
-                (i * bush.width) + random.randint(50, 100),
-                Config.GROUND_HEIGHT
-                )
-            self.rear.add(bush)
-
-        for i in range(70):
-            grass = Grass()
-            grass.rect.bottomleft = (
-                (i * tile.width) - random.randint(0, 20), 
-                Config.GROUND_HEIGHT + random.randint(0, 5)
+            bush = Bush.image(self.rng)
+            self.rear.add(
+                bush,
+                bottomleft=((i * bush.get_width()) + self.rng.randint(50, 100), Config.GROUND_HEIGHT)
                 )
-            self.fore.add(grass)
 
-        tree = Tree()
-        tree.rect.midbottom = (random.choice([400, 450, 500]), Config.GROUND_HEIGHT)
-        self.trees.add(tree)
-        self.last_tree = tree
-
-        obstacle = Obstacle.gen()
-        obstacle.rect.bottomleft = (Config.S_WIDTH, Config.GROUND_HEIGHT)
-        self.obstacles.add(obstacle)
-        self.last_obstacle = obstacle
+        self.course = Course(self.rng.getrandbits(64))
+        self.spawn()
 
         self.logger.info("Game.setup complete")
 
     def update(self):
-        self.logger.debug("Game.update start")
-        for bg in self.backgrounds:
-            bg.update()
+        if logging_service.HOT:
+            self.logger.debug("Game.update start", extra=logging_service.LIMITED)
+        if self.background is not None:
+            self.background.update()
         self.rear.update()
         self.trees.update()
-        if Config.S_WIDTH - self.last_tree.rect.right > random.randrange(800, 1500, 100):
-            new_tree = Tree()
-            new_tree.rect.bottomleft = (Config.S_WIDTH, Config.GROUND_HEIGHT)
-            self.last_tree = new_tree
-            self.trees.add(new_tree)
-        self.fore.update()
         self.ground.update()
-        self.logger.debug("Game.update complete")
-
-    def draw(self):
-        self.logger.debug("Game.draw start")
-        for bg in self.backgrounds:
-            bg.draw(self.screen)
-        self.rear.draw(self.screen)
-        self.trees.draw(self.screen)
-        self.player.draw(self.screen)
-        self.obstacles.draw(self.screen)
-        self.fore.draw(self.screen)
-        self.ground.draw(self.screen)
-
-        self.scoreboard.draw(self.screen, self.display_font)
-        self.timer.draw(self.screen, self.display_font)
-        self.health.draw(self.screen, self.player.hp)
-        self.logger.debug("Game.draw complete")
+        self.world.advance()
+        if logging_service.HOT:
+            self.logger.debug("Game.update complete", extra=logging_service.LIMITED)
+
+    def spawn(self):
+        """Adds the obstacles and trees of the course that have reached the right edge of the screen."""
+        distance = self.world.distance
+        obstacles, trees = self.course.take(distance + Config.S_WIDTH)
+        for x, cls in obstacles:
+            obstacle = self.pool.acquire(cls, self.world, x - distance)
+            self.obstacles.add(obstacle)
+            self.logger.debug("New %s generated", obstacle)
+        for x, image in trees:
+            self.trees.add(image, bottomleft=(x - distance, Config.GROUND_HEIGHT))
+
+    def draw(self, alpha: float=1.0, player: bool=True):
+        """Draws the scene and HUD, interpolating moving sprites alpha of the way into the last tick."""
+        if logging_service.HOT:
+            self.logger.debug("Game.draw start", extra=logging_service.LIMITED)
+        # sprites moved by world.scroll last tick, draw them that far back scaled by (1 - alpha)
+        dx = round((alpha - 1) * self.world.scroll)
+        self.background.draw(self.screen, alpha)
+        self.rear.draw(self.screen, dx)
+        self.trees.draw(self.screen, dx)
+        if player:
+            self.player.draw(self.screen, alpha)
+        self.draw_group(self.obstacles, dx)
+        self.ground.draw(self.screen, alpha)
+
+        self.hud.draw(self.screen, self.player.hp)
+        self.display.invalidate()
+        if logging_service.HOT:
+            self.logger.debug("Game.draw complete", extra=logging_service.LIMITED)
+
+    def govern(self, frame_time: float):
+        """Passes a frame time in milliseconds to the quality governor while a run is in play."""
+        if self.paused or self.world.status is not GameState.GAME_PLAY:
+            return
+        if self.quality.observe(frame_time):
+            self.apply_quality()
+
+    def apply_quality(self):
+        """Sets the optional visual work of the current quality level on the scene."""
+        settings = self.quality.settings
+        self.player.blink = settings.blink
+        self.rear.step = settings.scenery_step
+        self.ground.grass_step = settings.scenery_step
+        if self.background is not None:
+            self.background.configure(visible=settings.background)
+
+    def draw_group(self, group: pygame.sprite.Group, dx: int):
+        """Draws a sprite group offset horizontally by dx."""
+        self.screen.blits(
+            blit_sequence=[(sprite.image, sprite.rect.move(dx, 0)) for sprite in group],
+            doreturn=False
+            )
 
     def check_input(self):
+        """Polls the input source once for this tick and handles pause and exit presses."""
+        self.input = self.controls.poll()
+        if self.input.exit:
+            self.logger.info("Game.exit_input")
+            self.running = False
 
-        def check_exit_key(event):
-            if event.type == pygame.QUIT or (
-                    event.type == pygame.KEYDOWN and event.key in Config.exit_keybind
-                ):
-                self.logger.info(f"Game.exit_input {event.type}")
-                return True
-            return False
-
-        def check_pause_key(event):
-            if event.type == pygame.KEYDOWN and event.key in Config.pause_keybind:
-                self.logger.info(f"Game.pause_input {event.key}")
-                return True
-            return False
-
-        for event in pygame.event.get():
-            if check_exit_key(event):
-                self.running = False
-
-            if Config.status is GameState.GAME_PLAY:
-                if check_pause_key(event):
-                    self.toggle_pause()
-            elif Config.status is GameState.GAME_END:
-                if check_pause_key(event):
-                    self.reset()
+        if self.input.overlay:
+            self.profiler.toggle_overlay()
+            # frozen frames are drawn once, repaint them so a hidden panel does not linger
+            self._pause_drawn = False
+            self._death_scene = None
+
+        if self.input.pause:
+            self.logger.info("Game.pause_input")
+            if self.world.status is GameState.GAME_PLAY:
+                self.toggle_pause()
+            elif self.world.status is GameState.GAME_END:
+                self.reset()
 
     def toggle_pause(self):
         if not self.paused:
             self.logger.info("Game paused")
             self.paused = True
+            self._pause_drawn = False
             self.timer.pause()
             AudioService.pause_bgm()
         elif self.paused:
@@ -152,64 +262,152 @@ class Game:
 
     def speed_up(self):
         """Speeds up the game at specified intervals."""
-        interval = 5
+        interval = Config.speed_up_interval
         time_elapsed = int(self.timer.time_elapsed)
         if time_elapsed % interval == 0 and self.speed_up_count < time_elapsed // interval:
             self.speed_up_count += 1
-            Config.BASE_SCROLL -= 1
-            self.logger.info(f"{self.timer.time_elapsed} elapsed, new speed {Config.BASE_SCROLL}")
+            self.world.base_scroll -= 1
+            self.logger.info("%s elapsed, new speed %s", self.timer.time_elapsed, self.world.base_scroll)
 
-    def run(self):
-        self.check_input()
+    def advance(self, dt: float) -> float:
+        """
+        Runs as many fixed simulation ticks of 1 / Config.TICK_RATE as dt seconds
+        covers, carrying the remainder to the next call.
 
-        #obstacle creation
-        if len(self.obstacles.sprites()) < 3 and self.last_obstacle.rect.x < Config.S_WIDTH * random.uniform(0.5, 0.8):
-            obstacle = Obstacle.gen()
-            self.obstacles.add(obstacle)
-            self.last_obstacle = obstacle
-            self.logger.debug(f"New {obstacle} generated")
+        Returns the interpolation factor for rendering, the fraction of a tick
+        the remainder represents.
+        """
+        tick = 1 / Config.TICK_RATE
+        self._accumulator += min(dt, Config.max_frame_time)
+        while self._accumulator >= tick and self.running:
+            self.step()
+            self._accumulator -= tick
+        return self._accumulator / tick
+
+    def step(self):
+        """Advances the simulation by one tick."""
+        if self.world.status is GameState.GAME_END:
+            self.death()
+        elif self.paused:
+            self.pause()
+        else:
+            self.run()
+        self.ticks += 1
+        if self.tick_clock:
+            self.clock.advance(1 / Config.TICK_RATE)
+
+    def render(self, alpha: float=1.0):
+        """Draws the current state, alpha of the way from the previous tick to the latest."""
+        with self.profiler.phase("draw"):
+            if self.world.status is GameState.GAME_END:
+                self.draw_death()
+            elif self.paused:
+                self.draw_pause()
+            else:
+                self.draw(alpha)
+
+    def run(self):
+        profiler = self.profiler
+        with profiler.phase("input"):
+            self.check_input()
 
-        if pygame.sprite.spritecollideany(self.player, self.obstacles, pygame.sprite.collide_mask):
-            for obstacle in pygame.sprite.spritecollide(self.player, self.obstacles, False, pygame.sprite.collide_mask):
+        with profiler.phase("collision"):
+            for obstacle in sweep_collide(self.player, self.obstacles):
                 self.player.hit()
 
-        self.player.update()
+        with profiler.phase("player"):
+            self.player.update(self.input)
 
-        self.obstacles.update()
-        for obstacle in self.obstacles:
-            if obstacle.check_score():
-                self.scoreboard.add()
-                AudioService.score()
+        with profiler.phase("obstacles"):
+            self.obstacles.update()
+            for obstacle in self.obstacles.sprites():
+                if obstacle.check_score():
+                    self.pool.release(obstacle)
+                    self.scoreboard.add()
+                    AudioService.score()
 
-        self.speed_up()
-        self.update()
-        self.draw()
+        with profiler.phase("update"):
+            self.speed_up()
+            self.update()
+
+        with profiler.phase("spawn"):
+            self.spawn()
 
         if self.player.hp == 0:
-            Config.status = GameState.GAME_END
+            self.world.status = GameState.GAME_END
+            if self.first_game_over is None:
+                self.first_game_over = self.ticks
             self.timer.stop()
-    
+            self.scoreboard.update_highscore()
+            AudioService.fade_bgm()
+            if self.history is not None:
+                self.history.record(self.run_record())
+
+    def run_record(self) -> RunRecord:
+        """Returns the record of the run that just ended."""
+        frames = self.profiler.stats(self.profiler.frames)
+        return RunRecord(
+            finished=time.time(),
+            seed=self.seed,
+            score=self.scoreboard.score,
+            run_time=self.timer.run_time,
+            max_speed=-self.world.base_scroll,
+            frame_p50=frames["p50"],
+            frame_p95=frames["p95"],
+            frame_p99=frames["p99"],
+            )
+
     def pause(self):
-        self.check_input()
-        paused = self.display_font.render("GAME PAUSED", 1, "black")
-        self.screen.blit(paused, (Config.S_WIDTH/2-paused.get_width()/2, Config.S_HEIGHT/2-paused.get_height()/2))
+        with self.profiler.phase("input"):
+            self.check_input()
+
+    def draw_pause(self):
+        # the frozen scene stays on screen, so it and the banner only need drawing once.
+        # The scene is redrawn rather than kept, the screen may hold the profiler panel
+        if not self._pause_drawn:
+            self.draw()
+            paused = self.pause_banner
+            self.screen.blit(paused, (Config.S_WIDTH/2-paused.get_width()/2, Config.S_HEIGHT/2-paused.get_height()/2))
+            self._pause_drawn = True
 
     def death(self):
-        self.check_input()
-        self.draw()
-        AudioService.fade_bgm()
-        self.scoreboard.update_highscore()
-        self.player.death_animation(self.screen)
+        with self.profiler.phase("input"):
+            self.check_input()
+        if self.world.status is GameState.GAME_END:
+            with self.profiler.phase("player"):
+                self.player.death_animation(self.input)
+
+    def draw_death(self):
+        if not self.display.dirty_rendering:
+            self.draw(player=False)
+        elif self._death_scene is None:
+            # the scene is frozen on death, keep a copy without the player to repair from
+            self.draw(player=False)
+            self._death_scene = self.screen.copy()
+        elif self._player_drawn is not None:
+            self.screen.blit(self._death_scene, self._player_drawn, self._player_drawn)
+            self.display.mark(self._player_drawn)
+        self._player_drawn = self.player.draw(self.screen)
+        self.display.mark(self._player_drawn)
 
     def reset(self):
         self.logger.info("Game.reset start")
+        # a run can also be restarted before it ends, e.g. by BatchEnv
+        if self.world.status is not GameState.GAME_END:
+            self.timer.stop()
+        self.paused = False
         self.player.reset()
         self.scoreboard.reset()
-        self.obstacles.empty()
+        for sprite in self.obstacles.sprites():
+            self.pool.release(sprite)
         
-        Config.status = GameState.GAME_PLAY
-        Config.BASE_SCROLL = -5
+        self.world.reset()
+        self.speed_up_count = 0
+        self._accumulator = 0.0
+        self._death_scene = None
+        self._player_drawn = None
         self.setup()
+        self.apply_quality()
         self.timer.reset()
         self.timer.start()
         AudioService.start_bgm()
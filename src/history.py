@@ -0,0 +1,99 @@
+import os
+import sys
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import closing
+from typing import NamedTuple, Optional
+
+from .config import Config
+
+def user_data_dir() -> str:
+    """Returns the platform's per-user data directory for the game."""
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA", os.path.expanduser("~"))
+        return os.path.join(base, "RunningMan")
+    if sys.platform == "darwin":
+        return os.path.expanduser("~/Library/Application Support/RunningMan")
+    base = os.environ.get("XDG_DATA_HOME", os.path.expanduser("~/.local/share"))
+    return os.path.join(base, "running_man")
+
+class RunRecord(NamedTuple):
+    """A finished run, frame times in milliseconds over the profiler's window."""
+    finished: float
+    seed: Optional[int]
+    score: int
+    run_time: float
+    max_speed: int
+    frame_p50: float
+    frame_p95: float
+    frame_p99: float
+
+class RunHistory:
+    """
+    Every finished run, kept in an SQLite database in the user data directory.
+
+    The best score is read once when the history is opened. Runs passed to
+    record() are queued and written by a background thread, so game over
+    never waits on the disk. Call close() at exit to flush the queue.
+
+    Methods
+    ---
+    record(run: RunRecord) -> None
+        Queues a run to be written.
+    top(n: int=10) -> list
+        Returns the n best runs, reading the database on the calling thread.
+    close() -> None
+        Writes every queued run and stops the writer thread.
+    """
+    schema = """
+        CREATE TABLE IF NOT EXISTS runs ({});
+        CREATE INDEX IF NOT EXISTS runs_score ON runs (score DESC);
+        """.format(", ".join(RunRecord._fields))
+    insert = "INSERT INTO runs VALUES ({})".format(", ".join("?" * len(RunRecord._fields)))
+
+    def __init__(self, path: str=None):
+        self.logger = logging.getLogger("runningman.history.RunHistory")
+        self.path = path or Config.history_path or os.path.join(user_data_dir(), "history.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with closing(self.connect()) as db:
+            db.executescript(RunHistory.schema)
+            self.best = db.execute("SELECT MAX(score) FROM runs").fetchone()[0] or 0
+        self._queue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self.write, name="history", daemon=True)
+        self._writer.start()
+        self.logger.info(f"Run history at {self.path}, best score {self.best}")
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def record(self, run: RunRecord) -> None:
+        self.best = max(self.best, run.score)
+        self._queue.put(run)
+
+    def write(self) -> None:
+        """Writes queued runs until close() is called, runs on the writer thread."""
+        with closing(self.connect()) as db:
+            while True:
+                runs = [self._queue.get()]
+                # take everything else already queued in the same transaction
+                while not self._queue.empty():
+                    runs.append(self._queue.get())
+                stop = None in runs
+                runs = [run for run in runs if run is not None]
+                if runs:
+                    with db:
+                        db.executemany(RunHistory.insert, runs)
+                    self.logger.debug(f"Wrote {len(runs)} runs")
+                if stop:
+                    return
+
+    def top(self, n: int=10) -> list:
+        with closing(self.connect()) as db:
+            rows = db.execute("SELECT * FROM runs ORDER BY score DESC, run_time ASC LIMIT ?", (n,)).fetchall()
+        return [RunRecord(*row) for row in rows]
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._writer.join()
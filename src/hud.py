@@ -0,0 +1,89 @@
+import pygame
+import string
+import logging
+
+from .config import Config, GameState
+
+class GlyphAtlas:
+    """
+    Every printable character of a font pre-rendered once, so text can be
+    composed from cached glyphs instead of rasterised each frame.
+
+    Methods
+    ---
+    size(text: str) -> tuple
+        Returns the width and height the text takes up.
+    blit(surface: pygame.Surface, text: str, pos: tuple) -> pygame.Rect
+        Draws the text with its top left corner at pos.
+    render(text: str) -> pygame.Surface
+        Returns a new Surface holding the text.
+    """
+    chars = string.ascii_letters + string.digits + string.punctuation + " "
+
+    def __init__(self, font: pygame.font.Font, color=(0, 0, 0)):
+        self.glyphs = {char: font.render(char, 1, color) for char in GlyphAtlas.chars}
+        self.height = max(glyph.get_height() for glyph in self.glyphs.values())
+
+    def size(self, text: str) -> tuple:
+        return sum(self.glyphs[char].get_width() for char in text), self.height
+
+    def blit(self, surface: pygame.Surface, text: str, pos: tuple) -> pygame.Rect:
+        x, y = pos
+        blits = []
+        for char in text:
+            glyph = self.glyphs[char]
+            blits.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(blit_sequence=blits, doreturn=False)
+        return pygame.Rect(pos, (x - pos[0], self.height))
+
+    def render(self, text: str) -> pygame.Surface:
+        surface = pygame.Surface(self.size(text), pygame.SRCALPHA)
+        self.blit(surface, text, (0, 0))
+        return surface
+
+class HUD:
+    """
+    The score, timer and health bar, composed into a cached layer.
+
+    The layer is only rebuilt when the score, high score, displayed time, HP
+    or game state change, otherwise drawing it is one blits() call.
+    """
+    def __init__(self, world, scoreboard, timer, health, atlas: GlyphAtlas):
+        self.logger = logging.getLogger("runningman.hud.HUD")
+        self.world = world
+        self.scoreboard = scoreboard
+        self.timer = timer
+        self.health = health
+        self.atlas = atlas
+        self.surface = pygame.Surface((Config.S_WIDTH, Config.S_HEIGHT), pygame.SRCALPHA)
+        self.rects = []
+        self._state = None
+
+    def draw(self, screen: pygame.Surface, player_hp: int) -> list:
+        """Draws the HUD, rebuilding it first if anything shown has changed, and returns the areas drawn."""
+        state = (
+            self.world.status,
+            self.scoreboard.score,
+            self.scoreboard.high_score,
+            self.timer.display_time(),
+            player_hp,
+            )
+        if state != self._state:
+            self._state = state
+            self.rebuild(player_hp)
+        screen.blits(blit_sequence=[(self.surface, rect, rect) for rect in self.rects], doreturn=False)
+        return self.rects
+
+    def rebuild(self, player_hp: int) -> None:
+        for rect in self.rects:
+            self.surface.fill((0, 0, 0, 0), rect)
+        rects = [
+            self.health.draw(self.surface, player_hp),
+            self.scoreboard.draw(self.surface, self.atlas),
+            self.timer.draw(self.surface, self.atlas),
+            ]
+        top = rects[0].unionall(rects[1:])
+        self.rects = [top]
+        if self.world.status is GameState.GAME_END:
+            self.rects.append(self.scoreboard.draw_highscore(self.surface, self.atlas))
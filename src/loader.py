@@ -0,0 +1,85 @@
+import pygame
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import Config
+
+class AssetLoader:
+    """
+    Runs slow loading work on a thread pool and finishes it on the main thread.
+
+    Each job is a function run on a worker, typically decoding a file, and a
+    callback given its result on the main thread by poll(), typically
+    converting it for the display and caching it. Optional jobs, like the
+    music, do not count towards ready and may finish after the game starts.
+
+    Methods
+    ---
+    submit(work, *args, then=None, required: bool=True) -> None
+        Queues work(*args) for a worker, then(result) runs when it is polled.
+    poll() -> float
+        Finishes every completed job and returns the fraction of required
+        jobs done.
+    ready -> bool
+        True once every required job has finished.
+    done -> bool
+        True once every job has finished.
+    """
+    def __init__(self, workers: int=None):
+        self.logger = logging.getLogger("runningman.loader.AssetLoader")
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or Config.loader_workers,
+            thread_name_prefix="loader"
+            )
+        self._jobs = []
+        self._required = 0
+        self._finished = 0
+
+    def submit(self, work, *args, then=None, required: bool=True) -> None:
+        self._jobs.append((self.executor.submit(work, *args), then, required))
+        self._required += required
+
+    def poll(self) -> float:
+        pending = []
+        for job in self._jobs:
+            future, then, required = job
+            if not future.done():
+                pending.append(job)
+                continue
+            # re-raises anything the worker raised
+            result = future.result()
+            if then is not None:
+                then(result)
+            self._finished += required
+        self._jobs = pending
+        if not self._jobs:
+            self.executor.shutdown(wait=False)
+        return self._finished / self._required if self._required else 1.0
+
+    @property
+    def ready(self) -> bool:
+        return self._finished == self._required
+
+    @property
+    def done(self) -> bool:
+        return not self._jobs
+
+class LoadingScreen:
+    """A progress bar shown while an AssetLoader works."""
+    width = 400
+    height = 16
+
+    def __init__(self, screen: pygame.Surface):
+        self.screen = screen
+        font = pygame.font.Font("./assets/font/monogram.ttf", 25)
+        self.label = font.render("LOADING", 1, (255, 255, 255))
+        self.bar = pygame.Rect(0, 0, LoadingScreen.width, LoadingScreen.height)
+        self.bar.center = (Config.S_WIDTH / 2, Config.S_HEIGHT / 2)
+
+    def draw(self, progress: float) -> None:
+        self.screen.fill((0, 0, 0))
+        self.screen.blit(self.label, self.label.get_rect(midbottom=(self.bar.centerx, self.bar.top - 10)))
+        pygame.draw.rect(self.screen, (255, 255, 255), self.bar, 1)
+        filled = self.bar.inflate(-4, -4)
+        filled.width = round(filled.width * progress)
+        self.screen.fill((255, 255, 255), filled)
@@ -0,0 +1,92 @@
+import queue
+import logging
+import logging.handlers
+
+from .config import Config
+
+# per-tick debug messages are only logged when this is set, it is read once
+# at import so a disabled call site costs a single global lookup. They are
+# marked as rate limited, other records are never dropped:
+#     if logging_service.HOT:
+#         self.logger.debug("...", ..., extra=logging_service.LIMITED)
+HOT = Config.log_hot
+LIMITED = {"rate_limited": True}
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most one record per call site every interval seconds.
+
+    Only records logged with extra=LIMITED are limited. The next record let
+    through from a call site notes how many were dropped since the last one,
+    and pending() hands back the last dropped record of every site that has
+    not had one let through since, so counts are not lost at exit.
+    """
+    def __init__(self, interval: float=None):
+        super().__init__()
+        self.interval = Config.log_rate_limit if interval is None else interval
+        # (pathname, lineno) -> [time last let through, records dropped since, last dropped]
+        self._sites = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "rate_limited", False):
+            return True
+        key = (record.pathname, record.lineno)
+        site = self._sites.get(key)
+        if site is None:
+            self._sites[key] = [record.created, 0, None]
+            return True
+        if record.created - site[0] < self.interval:
+            site[1] += 1
+            site[2] = record
+            return False
+        if site[1]:
+            record.msg = f"{record.msg} ({site[1]} similar dropped)"
+        site[0], site[1], site[2] = record.created, 0, None
+        return True
+
+    def pending(self) -> list:
+        """Returns the last dropped record of each site with drops not yet noted, noting the count on it."""
+        records = []
+        for site in self._sites.values():
+            if site[1]:
+                record = site[2]
+                record.msg = f"{record.msg} (last of {site[1]} similar dropped)"
+                records.append(record)
+                site[1], site[2] = 0, None
+        return records
+
+class LogListener(logging.handlers.QueueListener):
+    """A QueueListener that writes the rate limiter's pending drop counts before it stops."""
+    def __init__(self, queue, limiter: RateLimitFilter, *handlers):
+        super().__init__(queue, *handlers)
+        self.limiter = limiter
+
+    def stop(self):
+        for record in self.limiter.pending():
+            self.queue.put_nowait(record)
+        super().stop()
+
+def start(path: str, level=None) -> LogListener:
+    """
+    Sends the game's log records through a queue to a file written by a
+    background thread, so logging never waits on the disk.
+
+    Hot records are rate limited per call site before they are queued, so
+    dropped records are never formatted. Stop the returned listener at exit
+    to flush the queue and the counts of records dropped.
+    """
+    log = logging.getLogger("runningman")
+    log.setLevel(level or Config.log_level)
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    limiter = RateLimitFilter()
+    handler.addFilter(limiter)
+    log.addHandler(handler)
+
+    file_handler = logging.FileHandler(path, mode="w")
+    file_handler.setFormatter(logging.Formatter(
+        "%(asctime)s - %(levelname)s - %(name)s - %(filename)s - %(lineno)d - %(message)s"
+        ))
+    listener = LogListener(records, limiter, file_handler)
+    listener.start()
+    return listener
@@ -1,22 +1,38 @@
 import pygame
-import random
 from .config import Config
+from .assets import AssetRegistry
 
 vec = pygame.math.Vector2
 
 class Obstacle(pygame.sprite.Sprite):
-    def __init__(self, image_path: str, scale: float=1.0):
+    """
+    Something the player has to jump over, drawn from the image at path
+    scaled by scale. Subclasses only set path and scale.
+    """
+    path = None
+    scale = 1.0
+
+    def __init__(self, world, x: int=Config.S_WIDTH):
         super().__init__()
-        self.image = pygame.image.load(image_path).convert_alpha()
-        if scale:
-            self.image = pygame.transform.scale_by(self.image, scale)
+        self.world = world
+        self.image = AssetRegistry.image(self.path, alpha=True, scale=self.scale)
         self.rect = self.image.get_rect()
-        self.mask = pygame.mask.from_surface(self.image)
-        self.start_pos = vec((Config.S_WIDTH, Config.GROUND_HEIGHT))
+        self.mask = AssetRegistry.mask(self.path, scale=self.scale)
+        self.start_pos = vec((x, Config.GROUND_HEIGHT))
+        self.rect.bottomleft = self.start_pos
+        # x at the start of the last tick, for swept collision
+        self.prev_x = self.rect.x
+
+    def respawn(self, world, x: int=Config.S_WIDTH):
+        """Moves a pooled obstacle back to the ground at x."""
+        self.world = world
+        self.start_pos = vec((x, Config.GROUND_HEIGHT))
         self.rect.bottomleft = self.start_pos
+        self.prev_x = self.rect.x
 
     def update(self):
-        self.rect.x += Config.scroll
+        self.prev_x = self.rect.x
+        self.rect.x += self.world.scroll
     
     def check_score(self):
         if self.rect.right < 0:
@@ -24,40 +40,29 @@ class Obstacle(pygame.sprite.Sprite):
             return True
         return False
 
-    @staticmethod
-    def gen():
-        choice = random.randint(0, 99)
-        if choice < 5:
-            return Statue()
-        elif choice < 10:
-            return Signboard()
-        elif choice < 30:
-            return Scarecrow()
-        elif choice < 80:
-            return random.choice([Crate(), Box()])
-        else:
-            return Logs()
+    @classmethod
+    def size(cls) -> tuple:
+        """Returns the width and height of this type of obstacle."""
+        return AssetRegistry.image(cls.path, alpha=True, scale=cls.scale).get_size()
 
 class Logs(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/logs.png", 1.5)
+    path = "./assets/images/logs.png"
+    scale = 1.5
 
 class Crate(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/crate.png")
+    path = "./assets/images/crate.png"
 
 class Box(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/box.png")
+    path = "./assets/images/box.png"
 
 class Signboard(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/signboard.png", 1.5)
+    path = "./assets/images/signboard.png"
+    scale = 1.5
 
 class Scarecrow(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/scarecrow.png", 1.2)
+    path = "./assets/images/scarecrow.png"
+    scale = 1.2
 
 class Statue(Obstacle):
-    def __init__(self):
-        super().__init__("./assets/images/statue.png", 1.5)
\ No newline at end of file
+    path = "./assets/images/statue.png"
+    scale = 1.5
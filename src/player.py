@@ -4,21 +4,32 @@ import logging
 from .config import Config
 from .audio_service import AudioService
 from .visuals import PlayerSprites
+from .controls import InputFrame
+from .utils import SystemClock
+from . import logging_service
 
 vec = pygame.math.Vector2
 
 class Player(pygame.sprite.Sprite):
     base_health = 3
+    # horizontal speed when moving, and vertical velocity on take off and at most when falling
+    run_speed = 3
+    jump_velocity = -20
+    terminal_velocity = 16
 
-    def __init__(self, health: int=base_health):
+    def __init__(self, world, health: int=base_health, clock=SystemClock):
         super().__init__()
         self.logger = logging.getLogger("runningman.player.Player")
-        self._speed = 3
+        self.world = world
+        self.clock = clock
+        self._speed = Player.run_speed
         self.hp = health
         self.start_pos = (75, Config.GROUND_HEIGHT)
 
         # player status
         self.immunity = 0
+        # fade while immune, visual only and shed by the quality governor
+        self.blink = True
         self._action = "walk"
         self.velocity = vec(0, 0)
         self.in_air = False
@@ -26,13 +37,15 @@ class Player(pygame.sprite.Sprite):
         # player sprite
         self.sprites = PlayerSprites()
         self.animation_index = 0
-        self.update_time = pygame.time.get_ticks()
+        self.update_time = self.clock.get_ticks()
         self.update_animation()
         self.rect = self.image.get_rect(bottomleft=self.start_pos)
+        self.prev_pos = vec(self.rect.topleft)
         self.logger.info("Player object initialised")
 
     def get_status(self):
-        self.logger.debug(f"hp: {self.hp}, in_air: {self.in_air}, velocity: {self.velocity}")
+        if logging_service.HOT:
+            self.logger.debug("hp: %s, in_air: %s, velocity: %s", self.hp, self.in_air, self.velocity, extra=logging_service.LIMITED)
         if self.hp > 0:
             if self.in_air:
                 self.update_action("jump")
@@ -42,30 +55,36 @@ class Player(pygame.sprite.Sprite):
                 self.update_action("run")
 
     def update_action(self, new_action: str):
-        self.logger.debug(f"player.update_action({new_action})")
+        if logging_service.HOT:
+            self.logger.debug("player.update_action(%s)", new_action, extra=logging_service.LIMITED)
         if new_action not in self.sprites.actions:
             raise ValueError(f"action must be one of {self.sprites.actions}")
         if new_action != self._action:
             self._action = new_action
             self.animation_index = 0
-            self.update_time = pygame.time.get_ticks()
+            self.update_time = self.clock.get_ticks()
 
     def update_animation(self):
-        self.logger.debug("player.update_animation")
+        if logging_service.HOT:
+            self.logger.debug("player.update_animation", extra=logging_service.LIMITED)
         ANIMATION_COOLDOWN = 100
         # compare current time to last update
-        if pygame.time.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
-            self.update_time = pygame.time.get_ticks()
+        if self.clock.get_ticks() - self.update_time > ANIMATION_COOLDOWN:
+            self.update_time = self.clock.get_ticks()
             self.animation_index += 1
-            self.logger.debug("player.animation_index += 1")
+            if logging_service.HOT:
+                self.logger.debug("player.animation_index += 1", extra=logging_service.LIMITED)
         if self._action != "death" and self.animation_index >= self.sprites.num_frames(self._action):
             self.animation_index = 0
-        self.image = self.sprites.parse_sprite(self._action, self.animation_index)
-        self.mask = pygame.mask.from_surface(self.image)
+        self.frame = self.sprites.frame(self._action, self.animation_index)
+        if self.velocity.x < 0:
+            self.image, self.mask = self.frame.mirrored, self.frame.mirrored_mask
+        else:
+            self.image, self.mask = self.frame.image, self.frame.mask
 
-    def move(self):
-        self.logger.debug("player.move")
-        keys = pygame.key.get_pressed()
+    def move(self, controls: InputFrame):
+        if logging_service.HOT:
+            self.logger.debug("player.move", extra=logging_service.LIMITED)
 
         def apply_friction(velocity: float) -> float:
             """Calculate and return velocity after applying friction."""
@@ -79,36 +98,42 @@ class Player(pygame.sprite.Sprite):
                     velocity = 0
             return velocity
 
-        if keys[Config.left_keybind]:
-            self.logger.debug("left input detected")
+        if controls.left:
+            if logging_service.HOT:
+                self.logger.debug("left input detected", extra=logging_service.LIMITED)
             self.velocity.x = -self._speed
-            Config.scroll = Config.BASE_SCROLL + self._speed
-        elif keys[Config.right_keybind]:
-            self.logger.debug("right input detected")
+            self.world.scroll = self.world.base_scroll + self._speed
+        elif controls.right:
+            if logging_service.HOT:
+                self.logger.debug("right input detected", extra=logging_service.LIMITED)
             self.velocity.x = self._speed
-            Config.scroll = Config.BASE_SCROLL - self._speed
+            self.world.scroll = self.world.base_scroll - self._speed
         elif not self.in_air:
-            self.logger.debug(f"player.in_air {self.in_air}, apply friction")
+            if logging_service.HOT:
+                self.logger.debug("player.in_air %s, apply friction", self.in_air, extra=logging_service.LIMITED)
             self.velocity.x = apply_friction(self.velocity.x)
-            Config.scroll = Config.BASE_SCROLL
+            self.world.scroll = self.world.base_scroll
 
         # jump
-        if keys[Config.up_keybind] and not self.in_air:
-            self.logger.debug("jump input detected")
+        if controls.jump and not self.in_air:
+            if logging_service.HOT:
+                self.logger.debug("jump input detected", extra=logging_service.LIMITED)
             AudioService.jump()
-            self.velocity.y = -20
+            self.velocity.y = Player.jump_velocity
             self.in_air = True
         
         # apply gravity
         if self.in_air:
-            self.logger.debug(f"player.in_air {self.in_air}, apply gravity")
+            if logging_service.HOT:
+                self.logger.debug("player.in_air %s, apply gravity", self.in_air, extra=logging_service.LIMITED)
             self.velocity.y += Config.GRAVITY
-            if self.velocity.y > 16: # terminal velocity
-                self.velocity.y = 16
+            if self.velocity.y > Player.terminal_velocity:
+                self.velocity.y = Player.terminal_velocity
 
         # applying velocity
         self.rect.topleft += self.velocity
-        self.logger.debug(f"player.move({self.velocity})")
+        if logging_service.HOT:
+            self.logger.debug("player.move(%s)", self.velocity, extra=logging_service.LIMITED)
 
     def hit(self):
         if self.immunity == 0:
@@ -121,6 +146,7 @@ class Player(pygame.sprite.Sprite):
     def reset(self, health: int=base_health):
         self.hp = health
         self.rect.topleft = self.start_pos
+        self.prev_pos = vec(self.rect.topleft)
         self.in_air = False
         self.immunity = 0
         self.velocity = vec(0, 0)
@@ -129,41 +155,46 @@ class Player(pygame.sprite.Sprite):
     def immunity_animation(self):
         if self.immunity > 0:
             self.immunity -= 1
-            if self.immunity % 10 < 5:
-                self.image.set_alpha(100)
-            else:
-                self.image.set_alpha(255)
+            if self.blink and self.immunity % 10 < 5:
+                self.image = self.frame.faded_mirrored if self.velocity.x < 0 else self.frame.faded
 
-    def update(self):
-        self.move()
-        self.get_status()
-        self.update_animation()
-
-    def draw(self, screen: pygame.Surface, box: bool=False):
-        self.immunity_animation()
+    def collide_bounds(self):
         # ground collision
         if self.rect.bottom >= Config.GROUND_HEIGHT:
-            self.logger.debug(f"player collide with ground")
+            if logging_service.HOT:
+                self.logger.debug("player collide with ground", extra=logging_service.LIMITED)
             self.rect.bottom = Config.GROUND_HEIGHT
             self.in_air = False
             self.velocity.y = 0
 
         # edge collision
         if self.rect.left < 0:
-            self.logger.debug("player collide left")
+            if logging_service.HOT:
+                self.logger.debug("player collide left", extra=logging_service.LIMITED)
             self.rect.left = 0
         elif self.rect.right > Config.S_WIDTH:
-            self.logger.debug("player collide right")
+            if logging_service.HOT:
+                self.logger.debug("player collide right", extra=logging_service.LIMITED)
             self.rect.right = Config.S_WIDTH
 
-        flip_x = self.velocity.x < 0
-        screen.blit(pygame.transform.flip(self.image, flip_x, False), self.rect)
+    def update(self, controls: InputFrame=InputFrame()):
+        self.prev_pos = vec(self.rect.topleft)
+        self.move(controls)
+        self.collide_bounds()
+        self.get_status()
+        self.update_animation()
+        self.immunity_animation()
+
+    def draw(self, screen: pygame.Surface, alpha: float=1.0, box: bool=False) -> pygame.Rect:
+        """Draws the player alpha of the way from its previous to its current position."""
+        pos = self.prev_pos.lerp(self.rect.topleft, alpha)
+        drawn = screen.blit(self.image, (round(pos.x), round(pos.y)))
         if box:
             pygame.draw.rect(screen, "red", self.rect, 1)
+        return drawn
 
-    def death_animation(self, screen):
+    def death_animation(self, controls: InputFrame=InputFrame()):
         self.update_action("death")
         
-        self.update()
+        self.update(controls)
         self.rect = self.image.get_rect(bottomleft=self.rect.bottomleft)
-        self.draw(screen)
\ No newline at end of file
@@ -0,0 +1,44 @@
+import logging
+from collections import defaultdict
+
+class SpritePool:
+    """
+    Recycles sprites by type instead of constructing new ones.
+
+    Pooled classes implement respawn(*args), which resets a released
+    instance as if it had been constructed with cls(*args).
+
+    Methods
+    ---
+    acquire(cls: type, *args) -> pygame.sprite.Sprite
+        Returns a recycled instance of cls, or a new one if none are free.
+    release(sprite: pygame.sprite.Sprite) -> None
+        Removes the sprite from its groups and returns it to the pool.
+    prewarm(cls: type, n: int, *args) -> None
+        Constructs instances of cls ahead of time until n are free.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger("runningman.pool.SpritePool")
+        self._free = defaultdict(list)
+
+    def free(self, cls: type) -> int:
+        """Returns the number of free instances of cls."""
+        return len(self._free[cls])
+
+    def acquire(self, cls: type, *args):
+        free = self._free[cls]
+        if free:
+            sprite = free.pop()
+            sprite.respawn(*args)
+            return sprite
+        self.logger.debug("Pool empty, constructing %s", cls.__name__)
+        return cls(*args)
+
+    def release(self, sprite) -> None:
+        sprite.kill()
+        self._free[type(sprite)].append(sprite)
+
+    def prewarm(self, cls: type, n: int, *args) -> None:
+        free = self._free[cls]
+        while len(free) < n:
+            free.append(cls(*args))
@@ -0,0 +1,203 @@
+import pygame
+import json
+import time
+import logging
+from array import array
+
+from .config import Config
+
+class RingBuffer:
+    """
+    A fixed-size buffer of floats that overwrites its oldest samples.
+
+    Methods
+    ---
+    append(value: float) -> None
+        Stores a sample, dropping the oldest one when full.
+    values() -> list
+        Returns the stored samples from oldest to newest.
+    percentile(p: float) -> float
+        Returns the p-th percentile (0-100) of the stored samples.
+    """
+    def __init__(self, size: int):
+        self._data = array("d", bytes(8 * size))
+        self._size = size
+        self._index = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value: float) -> None:
+        self._data[self._index] = value
+        self._index = (self._index + 1) % self._size
+        if self._count < self._size:
+            self._count += 1
+
+    def values(self) -> list:
+        if self._count < self._size:
+            return self._data[:self._count].tolist()
+        return (self._data[self._index:] + self._data[:self._index]).tolist()
+
+    def percentile(self, p: float) -> float:
+        if not self._count:
+            return 0.0
+        values = sorted(self._data[:self._count])
+        return values[min(self._count - 1, int(p / 100 * self._count))]
+
+class Phase:
+    """Context manager that adds its elapsed time to a phase of the current frame."""
+    __slots__ = ("profiler", "name", "_start")
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self._start)
+        return False
+
+class FrameProfiler:
+    """
+    Times each phase of a frame and keeps a rolling history of the last
+    Config.profiler_samples frames.
+
+    Wrap each phase in `with profiler.phase(name):` between begin_frame()
+    and end_frame(). Times are stored in milliseconds.
+
+    Methods
+    ---
+    phase(name: str) -> Phase
+        Returns the reusable timer for a phase.
+    begin_frame() -> None
+        Starts timing a frame.
+    end_frame() -> float
+        Stores the frame's total and per-phase times, returning the total.
+    summary() -> dict
+        Returns p50/p95/p99 and mean of the frame and every phase.
+    draw(screen: pygame.Surface) -> pygame.Rect
+        Draws the overlay with phase timings and a frame-time graph if visible,
+        returning the area drawn to.
+    dump(path: str) -> None
+        Writes summary() and the raw frame history to a JSON file.
+    """
+    phases = ("input", "spawn", "collision", "player", "obstacles", "update", "draw", "flip")
+    overlay_size = (260, 190)
+    graph_height = 60
+
+    def __init__(self, samples: int=None):
+        self.logger = logging.getLogger("runningman.profiler.FrameProfiler")
+        self.samples = samples or Config.profiler_samples
+        self.enabled = Config.profiler
+        self.visible = False
+        self.frames = RingBuffer(self.samples)
+        self.history = {}
+        self._timers = {}
+        self._current = {}
+        self._frame_start = 0.0
+        self._font = None
+        self._lines = []
+        self._frames_since_refresh = 0
+        for name in self.phases:
+            self.phase(name)
+
+    def phase(self, name: str) -> Phase:
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = Phase(self, name)
+            self.history[name] = RingBuffer(self.samples)
+        return timer
+
+    def record(self, name: str, seconds: float) -> None:
+        self._current[name] = self._current.get(name, 0.0) + seconds
+
+    def toggle_overlay(self) -> None:
+        self.visible = not self.visible
+        self.logger.info(f"Profiler overlay visible: {self.visible}")
+
+    def begin_frame(self) -> None:
+        self._current.clear()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> float:
+        frame_time = (time.perf_counter() - self._frame_start) * 1000
+        if not self.enabled:
+            return frame_time
+        self.frames.append(frame_time)
+        for name, buffer in self.history.items():
+            buffer.append(self._current.get(name, 0.0) * 1000)
+        return frame_time
+
+    @staticmethod
+    def stats(buffer: RingBuffer) -> dict:
+        values = buffer.values()
+        return {
+            "p50": buffer.percentile(50),
+            "p95": buffer.percentile(95),
+            "p99": buffer.percentile(99),
+            "mean": sum(values) / len(values) if values else 0.0,
+            }
+
+    def summary(self) -> dict:
+        return {
+            "frame": self.stats(self.frames),
+            "phases": {name: self.stats(buffer) for name, buffer in self.history.items()},
+            }
+
+    def dump(self, path: str) -> None:
+        data = self.summary()
+        data["samples"] = len(self.frames)
+        data["frames"] = self.frames.values()
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+        self.logger.info(f"Profile written to {path}")
+
+    def refresh_lines(self) -> None:
+        summary = self.summary()
+        frame = summary["frame"]
+        self._lines = [
+            self._font.render(
+                f"frame p50 {frame['p50']:.1f} p95 {frame['p95']:.1f} p99 {frame['p99']:.1f}", 0, "white"
+                )
+            ]
+        for name, stats in summary["phases"].items():
+            self._lines.append(
+                self._font.render(f"{name:<10} {stats['p50']:5.2f} {stats['p95']:5.2f}", 0, "white")
+                )
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        if not (self.enabled and self.visible):
+            return None
+        if self._font is None:
+            self._font = pygame.font.Font("./assets/font/monogram.ttf", 16)
+        # text is re-rendered a few times per second, the graph every frame
+        self._frames_since_refresh += 1
+        if not self._lines or self._frames_since_refresh >= Config.FPS // 2:
+            self._frames_since_refresh = 0
+            self.refresh_lines()
+
+        width, height = self.overlay_size
+        panel = pygame.Rect(Config.S_WIDTH - width - 10, 40, width, height)
+        screen.fill((0, 0, 0), panel)
+        y = panel.top + 4
+        for line in self._lines:
+            screen.blit(line, (panel.left + 6, y))
+            y += line.get_height()
+
+        # frame-time graph, the line marks the Config.FPS budget
+        budget = 1000 / Config.FPS
+        scale = self.graph_height / (budget * 2)
+        bottom = panel.bottom - 4
+        values = self.frames.values()[-(width - 12):]
+        for x, value in enumerate(values):
+            bar = min(self.graph_height, int(value * scale))
+            color = "green" if value <= budget else "red"
+            pygame.draw.line(screen, color, (panel.left + 6 + x, bottom), (panel.left + 6 + x, bottom - bar))
+        budget_y = bottom - int(budget * scale)
+        pygame.draw.line(screen, "yellow", (panel.left + 6, budget_y), (panel.right - 6, budget_y))
+        return panel
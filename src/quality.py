@@ -0,0 +1,73 @@
+import logging
+from typing import NamedTuple
+
+from .config import Config
+from .profiler import RingBuffer
+
+class QualityLevel(NamedTuple):
+    """The optional visual work done at one quality level."""
+    # fade the player while immune after a hit
+    blink: bool
+    # draw every scenery_step-th bush and grass tuft
+    scenery_step: int
+    # which background layers are drawn, farthest first
+    background: tuple
+
+class QualityGovernor:
+    """
+    Sheds optional visual work when frames overrun the Config.FPS budget and
+    restores it when there is headroom again.
+
+    Frame times are collected over Config.quality_window frames. If their
+    90th percentile exceeds Config.quality_shed of the budget the level goes
+    up one, if it is under Config.quality_restore of it the level comes down
+    one. Samples are discarded whenever the level changes, so the next
+    decision is judged only on frames drawn at the new level, and the gap
+    between the two thresholds keeps the level from flapping. Only
+    decoration is ever shed, the player and obstacles are always drawn.
+
+    Methods
+    ---
+    observe(frame_time: float) -> bool
+        Records a frame time in milliseconds, True if the level changed.
+    settings -> QualityLevel
+        The work done at the current level.
+    """
+    levels = (
+        QualityLevel(blink=True, scenery_step=1, background=(True, True, True, True, True)),
+        QualityLevel(blink=False, scenery_step=1, background=(True, True, True, True, True)),
+        QualityLevel(blink=False, scenery_step=2, background=(True, True, True, True, True)),
+        # the sky is kept, the distant mountains and clouds are dropped
+        QualityLevel(blink=False, scenery_step=2, background=(True, False, False, True, True)),
+        )
+
+    def __init__(self, level: int=None, adaptive: bool=None):
+        self.logger = logging.getLogger("runningman.quality.QualityGovernor")
+        self.level = Config.quality_level if level is None else level
+        self.adaptive = Config.quality_adaptive if adaptive is None else adaptive
+        self.budget = 1000 / Config.FPS
+        self.frames = RingBuffer(Config.quality_window)
+        self._observed = 0
+
+    @property
+    def settings(self) -> QualityLevel:
+        return QualityGovernor.levels[self.level]
+
+    def observe(self, frame_time: float) -> bool:
+        if not self.adaptive:
+            return False
+        self.frames.append(frame_time)
+        self._observed += 1
+        if self._observed < Config.quality_window:
+            return False
+        self._observed = 0
+        p90 = self.frames.percentile(90)
+        if p90 > self.budget * Config.quality_shed and self.level < len(QualityGovernor.levels) - 1:
+            self.level += 1
+        elif p90 < self.budget * Config.quality_restore and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+        self.frames = RingBuffer(Config.quality_window)
+        self.logger.info(f"Quality level {self.level}, frame p90 {p90:.1f} ms against a {self.budget:.1f} ms budget")
+        return True
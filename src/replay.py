@@ -0,0 +1,121 @@
+import zlib
+import struct
+import logging
+from typing import NamedTuple, Optional
+
+from .controls import InputFrame
+from .simulation import HeadlessRunner, SimulationResult
+
+# each InputFrame field is one bit of a byte, in field order
+FIELDS = InputFrame._fields
+
+def pack_input(frame: InputFrame) -> int:
+    return sum(1 << bit for bit, pressed in enumerate(frame) if pressed)
+
+def unpack_input(byte: int) -> InputFrame:
+    return InputFrame(*(bool(byte >> bit & 1) for bit in range(len(FIELDS))))
+
+class Replay(NamedTuple):
+    """
+    A recorded run: the seed, one packed input byte per tick, the score it
+    ended on and the tick its first run ended on, -1 if it never did.
+
+    Saved as a fixed header followed by the zlib-compressed input bytes.
+    Version 1 files have no game over tick, it is None and only their score
+    is verified.
+    """
+    seed: int
+    score: int
+    inputs: bytes
+    game_over: Optional[int] = None
+
+    MAGIC = b"RMRP"
+    VERSION = 2
+    # magic, version, seed, ticks, score, game over tick
+    HEADER = struct.Struct("<4sBqIIi")
+    HEADER_V1 = struct.Struct("<4sBqII")
+
+    @property
+    def ticks(self) -> int:
+        return len(self.inputs)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            f.write(Replay.HEADER.pack(Replay.MAGIC, Replay.VERSION, self.seed, self.ticks, self.score, self.game_over))
+            f.write(zlib.compress(self.inputs, 9))
+
+    @staticmethod
+    def load(path: str) -> "Replay":
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version = struct.unpack_from("<4sB", data)
+        if magic != Replay.MAGIC:
+            raise ValueError(f"{path} is not a replay file.")
+        if version == 1:
+            header = Replay.HEADER_V1
+            _, _, seed, ticks, score = header.unpack_from(data)
+            game_over = None
+        elif version == Replay.VERSION:
+            header = Replay.HEADER
+            _, _, seed, ticks, score, game_over = header.unpack_from(data)
+        else:
+            raise ValueError(f"{path} has unsupported replay version {version}.")
+        inputs = zlib.decompress(data[header.size:])
+        if len(inputs) != ticks:
+            raise ValueError(f"{path} is truncated, expected {ticks} ticks but found {len(inputs)}.")
+        return Replay(seed, score, inputs, game_over)
+
+class InputRecorder:
+    """Wraps an input source and records every frame it polls."""
+    def __init__(self, source):
+        self.source = source
+        self.inputs = bytearray()
+
+    def poll(self) -> InputFrame:
+        frame = self.source.poll()
+        self.inputs.append(pack_input(frame))
+        return frame
+
+    def replay(self, seed: int, score: int, game_over: Optional[int]) -> Replay:
+        """Returns the recording, game_over is the tick the first run ended on or None if it never did."""
+        return Replay(seed, score, bytes(self.inputs), -1 if game_over is None else game_over)
+
+class ReplayInput:
+    """Feeds a replay's recorded inputs back one tick at a time, then presses nothing."""
+    def __init__(self, replay: Replay):
+        self.inputs = replay.inputs
+        self.tick = 0
+
+    def poll(self) -> InputFrame:
+        if self.tick < len(self.inputs):
+            frame = unpack_input(self.inputs[self.tick])
+        else:
+            frame = InputFrame()
+        self.tick += 1
+        return frame
+
+class ReplayResult(NamedTuple):
+    replay: Replay
+    result: SimulationResult
+    # the tick the first run of the playback ended on, -1 if it never did
+    game_over: int
+
+    @property
+    def verified(self) -> bool:
+        """True if playback's first run ended on the recorded tick and the session on the recorded score."""
+        game_over = self.replay.game_over is None or self.game_over == self.replay.game_over
+        return game_over and self.result.score == self.replay.score
+
+def play(replay: Replay, render: bool=False) -> ReplayResult:
+    """Plays a replay back headlessly at uncapped speed."""
+    logger = logging.getLogger("runningman.replay")
+    runner = HeadlessRunner(seed=replay.seed, controls=ReplayInput(replay), render=render)
+    simulation = runner.run(replay.ticks, stop_at_game_over=False)
+    game_over = runner.game.first_game_over
+    result = ReplayResult(replay, simulation, -1 if game_over is None else game_over)
+    if not result.verified:
+        logger.warning(
+            f"Replay diverged: expected game over at tick {replay.game_over} and score {replay.score}, "
+            f"got game over at tick {result.game_over} and score {simulation.score}"
+            )
+    return result
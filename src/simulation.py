@@ -0,0 +1,79 @@
+import os
+import time
+import pygame
+import logging
+from typing import NamedTuple, Optional
+
+from .config import GameState
+from .audio_service import AudioService
+from .controls import NullInput
+from .game_service import Game
+
+class SimulationResult(NamedTuple):
+    ticks: int
+    seconds: float
+    ticks_per_second: float
+    score: int
+    game_over: bool
+
+class HeadlessRunner:
+    """
+    Drives a Game without a display, audio device or frame cap.
+
+    The game's clock only advances with the ticks simulated, so a run with
+    the same seed and input is reproducible on any machine. Every tick is
+    rendered unless render is False, in which case the game is built
+    without a display, HUD or background.
+
+    Methods
+    ---
+    run(ticks: int, stop_at_game_over: bool=True) -> SimulationResult
+        Steps the game for up to the given ticks, by default stopping early
+        at game over.
+    """
+    def __init__(self, seed: Optional[int]=0, controls=None, render: bool=True):
+        self.logger = logging.getLogger("runningman.simulation.HeadlessRunner")
+        # SDL reads these when the display and mixer are initialised
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+        AudioService.pre_init()
+        AudioService.music = False
+        pygame.init()
+        self.render = render
+        self.game = Game(
+            seed=seed,
+            controls=controls if controls is not None else NullInput(),
+            offscreen=True,
+            renders=render
+            )
+
+    def step(self) -> None:
+        """Advances the game by one tick."""
+        self.game.profiler.begin_frame()
+        self.game.step()
+        if self.render:
+            self.game.render()
+            with self.game.profiler.phase("flip"):
+                self.game.display.present()
+        self.game.profiler.end_frame()
+
+    def run(self, ticks: int, stop_at_game_over: bool=True) -> SimulationResult:
+        self.logger.info(f"Headless run for {ticks} ticks")
+        start = time.perf_counter()
+        tick = 0
+        while tick < ticks and self.game.running:
+            if stop_at_game_over and self.game.world.status is GameState.GAME_END:
+                break
+            self.step()
+            tick += 1
+        seconds = time.perf_counter() - start
+
+        result = SimulationResult(
+            ticks=tick,
+            seconds=seconds,
+            ticks_per_second=tick / seconds if seconds else 0.0,
+            score=self.game.scoreboard.score,
+            game_over=self.game.world.status is GameState.GAME_END
+            )
+        self.logger.info(f"Headless run complete: {result}")
+        return result
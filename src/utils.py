@@ -2,7 +2,7 @@ import pygame
 import time
 import logging
 
-from .config import Config, GameState
+from .config import Config
 from .visuals import Heart
 
 class Scoreboard:
@@ -17,14 +17,15 @@ class Scoreboard:
         Updates the high score if the current score is higher.
     reset() -> None
         Resets the score to zero.
-    draw(screen: pygame.Surface, font: pygame.font.Font, score: str="score") -> None
-        Draws the score or high score on the screen using the given font.
+    draw(screen: pygame.Surface, atlas: GlyphAtlas) -> pygame.Rect
+        Draws the score on the screen using the given glyph atlas.
+    draw_highscore(screen: pygame.Surface, atlas: GlyphAtlas) -> pygame.Rect
+        Draws the high score on the screen using the given glyph atlas.
     """
-    def __init__(self):
+    def __init__(self, high_score: int=0):
         self.logger = logging.getLogger("runningman.utils.Scoreboard")
-        self._high_score = 0
+        self._high_score = high_score
         self._score = 0
-        self.font_color = (0, 0, 0)
         self.logger.debug("Scoreboard initialised.")
 
     @property
@@ -34,7 +35,7 @@ class Scoreboard:
     
     @property
     def high_score(self) -> int:
-        """int: The highest score achieved this session."""
+        """int: The highest score achieved, this session or before it if started from a stored best."""
         return self._high_score
 
     def add(self, n: int=1) -> None:
@@ -54,30 +55,52 @@ class Scoreboard:
         self._score = 0
         self.logger.debug("Scoreboard.score reset.")
 
-    def draw(self, screen: pygame.Surface, font: pygame.font.Font) -> None:
-        """
-        Draws the score on the screen using the given font.
-        
-        Parameters
-        ---
-        score: str, optional
-            The score to draw: "score" or "highscore", default is "score".
-        """
-        if Config.status is GameState.GAME_PLAY:
-            text = font.render(f"Score: {self._score}", 1, self.font_color)
-            y = 10
-            x = Config.S_WIDTH // 2 - text.get_width() // 2
-            screen.blit(text, (x, y))
-        elif Config.status is GameState.GAME_END:
-            score_text = font.render(f"Score: {self._score}", 1, self.font_color)
-            score_pos = (Config.S_WIDTH // 2 - score_text.get_width() // 2, 10)
-            highscore_text = font.render(f"High Score: {self._high_score}", 1, self.font_color)
-            highscore_pos = (
-                Config.S_WIDTH // 2 - highscore_text.get_width() // 2, 
-                Config.S_HEIGHT // 2 + highscore_text.get_height() // 2
-                )
-
-            screen.blits(blit_sequence=((score_text, score_pos), (highscore_text, highscore_pos)))
+    def draw(self, screen: pygame.Surface, atlas) -> pygame.Rect:
+        """Draws the score centred at the top of the screen using the given GlyphAtlas."""
+        text = f"Score: {self._score}"
+        x = Config.S_WIDTH // 2 - atlas.size(text)[0] // 2
+        return atlas.blit(screen, text, (x, 10))
+
+    def draw_highscore(self, screen: pygame.Surface, atlas) -> pygame.Rect:
+        """Draws the high score in the middle of the screen using the given GlyphAtlas."""
+        text = f"High Score: {self._high_score}"
+        width, height = atlas.size(text)
+        return atlas.blit(screen, text, (Config.S_WIDTH // 2 - width // 2, Config.S_HEIGHT // 2 + height // 2))
+
+class SystemClock:
+    """The default time source, reading the wall clock and pygame's tick counter."""
+    @staticmethod
+    def time() -> float:
+        return time.time()
+
+    @staticmethod
+    def get_ticks() -> int:
+        return pygame.time.get_ticks()
+
+class SimulatedClock:
+    """
+    A time source that only moves when advanced, for deterministic simulation.
+
+    Methods
+    ---
+    advance(seconds: float) -> None
+        Moves the clock forward.
+    time() -> float
+        Returns the simulated time in seconds.
+    get_ticks() -> int
+        Returns the simulated time in milliseconds.
+    """
+    def __init__(self, start: float=0.0) -> None:
+        self._now = start
+
+    def advance(self, seconds: float) -> None:
+        self._now += seconds
+
+    def time(self) -> float:
+        return self._now
+
+    def get_ticks(self) -> int:
+        return int(self._now * 1000)
 
 class Stopwatch:
     """
@@ -99,9 +122,12 @@ class Stopwatch:
         Returns the time elapsed while stopwatch is still running.
     run_time() -> float
         Returns the run time after stopwatch has stopped.
+    display_time() -> str
+        Returns the elapsed or run time as shown on screen.
     """
-    def __init__(self) -> None:
+    def __init__(self, clock=SystemClock) -> None:
         self.logger = logging.getLogger("runningman.utils.Stopwatch")
+        self.clock = clock
         self._start_time = None
         self._stop_time = None
         self._pause_time = None
@@ -111,16 +137,16 @@ class Stopwatch:
 
     def start(self) -> None:
         """Starts the stopwatch if it is not running."""
-        if self._running or self._pause_time:
+        if self._running or self._pause_time is not None:
             raise RuntimeError("Stopwatch is already running.")
-        self._start_time = time.time()
+        self._start_time = self.clock.time()
         self._running = True
 
     def stop(self) -> None:
         """Stops the stopwatch if it is running."""
         if not self._running:
             raise RuntimeError("Stopwatch is not running.")
-        self._stop_time = time.time()
+        self._stop_time = self.clock.time()
         self._running = False
         self._pause_time = None
 
@@ -128,16 +154,16 @@ class Stopwatch:
         """Pauses the stopwatch while it is running."""
         if not self._running:
             raise RuntimeError("Stopwatch is not running.")
-        elif self._pause_time:
+        elif self._pause_time is not None:
             raise RuntimeError("Stopwatch is already paused.")
         else:
-            self._pause_time = time.time()
+            self._pause_time = self.clock.time()
 
     def resume(self) -> None:
         """Resumes the stopwatch if it is paused."""
-        if not self._pause_time:
+        if self._pause_time is None:
             raise RuntimeError("Stopwatch is not paused.")
-        self._paused_duration += time.time() - self._pause_time
+        self._paused_duration += self.clock.time() - self._pause_time
         self._pause_time = None
 
     @property
@@ -145,7 +171,7 @@ class Stopwatch:
         """Returns the time elapsed while stopwatch is still running."""
         if not self._running:
             raise RuntimeError("Stopwatch is not running, use run_time() instead for previous run time.")
-        return time.time() - self._start_time - self._paused_duration
+        return self.clock.time() - self._start_time - self._paused_duration
 
     @property
     def run_time(self) -> float:
@@ -163,13 +189,17 @@ class Stopwatch:
         self._pause_time = None
         self._paused_duration = 0
 
-    def draw(self, screen: pygame.Surface, font: pygame.font.Font):
-        """Draws the time on the screen using the given font."""
-        if Config.status is GameState.GAME_PLAY:
-            text = font.render(f"Time: {self.time_elapsed:.2f}s", 1, "black")
-        elif Config.status is GameState.GAME_END:
-            text = font.render(f"Time: {self.run_time:.2f}s", 1, "black")
-        screen.blit(text, (Config.S_WIDTH-10-text.get_width(), 10))
+    def display_time(self) -> str:
+        """Returns the elapsed time while running, or the run time once stopped, as shown on screen."""
+        if self._start_time is None:
+            return ""
+        seconds = self.time_elapsed if self._running else self.run_time
+        return f"Time: {seconds:.2f}s"
+
+    def draw(self, screen: pygame.Surface, atlas) -> pygame.Rect:
+        """Draws the time on the screen using the given GlyphAtlas."""
+        text = self.display_time()
+        return atlas.blit(screen, text, (Config.S_WIDTH-10-atlas.size(text)[0], 10))
 
 class HealthBar():
     def __init__(self, max_health: int=3):
@@ -181,17 +211,18 @@ class HealthBar():
             heart = Heart()
             heart.rect.topleft = (10 + point*25, 10)
             self.hearts.add(heart)
+        rects = [heart.rect for heart in self.hearts]
+        self.rect = rects[0].unionall(rects[1:])
 
         self.logger.debug("HealthBar initialised.")
 
-    def draw(self, screen: pygame.Surface, player_hp: int):
+    def draw(self, screen: pygame.Surface, player_hp: int) -> pygame.Rect:
         if player_hp > self.__max_health:
             player_hp = self.__max_health
 
-        for idx, heart in enumerate(self.hearts):
-            if idx+1 <= player_hp:
-                heart.image.set_alpha(255)
-            else:
-                heart.image.set_alpha(100)
-
-        self.hearts.draw(screen)
\ No newline at end of file
+        blits = [
+            (heart.image if idx+1 <= player_hp else heart.faded, heart.rect)
+            for idx, heart in enumerate(self.hearts)
+            ]
+        screen.blits(blit_sequence=blits, doreturn=False)
+        return self.rect
\ No newline at end of file
@@ -2,134 +2,453 @@ import pygame
 import random
 import json
 import logging
+import numpy as np
+from typing import NamedTuple
 
 from .config import Config
+from .assets import AssetRegistry
 
-class Background():
-    def __init__(self, x, y):
-        self.images = []
-        self.rects = []
+class Background:
+    """
+    Parallax background composited from the five background layers.
+
+    Consecutive layers sharing a speed in Config.BG_LAYER_SPEEDS are flattened
+    into one cached strip, the bottom strip opaque and the rest given the
+    fastest format their combined transparency allows, so each group costs
+    at most two blits per frame. Strips are cached by speeds and visible
+    layers and shared by every Background, so switching between prepared
+    combinations only swaps the strips drawn.
+
+    With Config.background_native set the layers are kept at their art
+    resolution, scale times smaller than the screen, and drawn into a canvas
+    of that size which is scaled up once per frame onto the screen, so the
+    layers are blended over a fraction of the pixels. Nearest neighbour
+    scaling makes the result the same as drawing the scaled layers, except
+    that the layers scroll in whole art pixels.
+
+    Methods
+    ---
+    prepare(visibles) -> None
+        Composites the strips for each visible tuple ahead of time.
+    configure(speeds: tuple=None, visible: tuple=None) -> None
+        Changes layer speeds or visibility, compositing if not prepared.
+    reset() -> None
+        Scrolls every layer back to its starting position.
+    """
+    count = 5
+    paths = [f"./assets/images/background_layer_{i}.png" for i in range(count)]
+    scale = 2.5
+    # (speeds, visible, layer scale) -> ((strip, speed), ...)
+    _strips = {}
+
+    def __init__(self, speeds: tuple=None):
+        self.logger = logging.getLogger("runningman.visuals.Background")
+        self.speeds = tuple(speeds or Config.BG_LAYER_SPEEDS)
+        self.visible = (True,) * Background.count
+        # screen pixels per strip pixel, the strips are drawn to a canvas scaled up by this
+        self.upscale = Background.scale / Background.layer_scale()
+        self.canvas = None
+        # each group is [strip, speed, offset], offsets are in screen pixels
+        self.groups = []
+        self._composited = None
+        self.composite()
+
+    @staticmethod
+    def layer_scale() -> float:
+        """The scale the layer images are loaded at."""
+        return 1.0 if Config.background_native else Background.scale
+
+    def prepare(self, visibles):
+        for visible in visibles:
+            self.strips(self.speeds, tuple(visible))
 
-        for img in range(5):
-            bg_image = pygame.image.load(f"./assets/images/background_layer_{img}.png").convert_alpha()
-            bg_image = pygame.transform.scale_by(bg_image, 2.5)
-            bg_rect = bg_image.get_rect()
-            bg_rect.topleft = (x, y)
+    def configure(self, speeds: tuple=None, visible: tuple=None):
+        if speeds is not None:
+            self.speeds = tuple(speeds)
+        if visible is not None:
+            self.visible = tuple(visible)
+        self.composite()
 
-            self.images.append(bg_image)
-            self.rects.append(bg_rect)
+    def composite(self):
+        key = (self.speeds, self.visible)
+        if key == self._composited:
+            return
+        self._composited = key
+        offsets = {speed: offset for _, speed, offset in self.groups}
+        self.groups = [[strip, speed, offsets.get(speed, 0.0)] for strip, speed in self.strips(*key)]
+
+    def strips(self, speeds: tuple, visible: tuple) -> tuple:
+        """Returns the (strip, speed) groups for these speeds and visible layers, compositing them once."""
+        scale = Background.layer_scale()
+        key = (speeds, visible, scale)
+        if key in Background._strips:
+            return Background._strips[key]
+
+        # [[layer images], speed] for each run of visible layers sharing a speed
+        runs = []
+        for path, speed, shown in zip(Background.paths, speeds, visible):
+            if not shown:
+                continue
+            image = AssetRegistry.image(path, alpha=True, scale=scale)
+            if runs and runs[-1][1] == speed:
+                runs[-1][0].append(image)
+            else:
+                runs.append([[image], speed])
+
+        groups = []
+        for layers, speed in runs:
+            if not groups:
+                strip = pygame.Surface(layers[0].get_size()).convert()
+            elif len(layers) == 1:
+                # a single layer is drawn from the shared image as is
+                groups.append((layers[0], speed))
+                continue
+            else:
+                strip = pygame.Surface(layers[0].get_size(), pygame.SRCALPHA)
+            strip.blits(((layer, (0, 0)) for layer in layers), doreturn=False)
+            if groups:
+                strip = AssetRegistry.optimise(strip)
+            groups.append((strip, speed))
+        Background._strips[key] = tuple(groups)
+        self.logger.debug(f"Background composited into {len(groups)} strips for {visible}")
+        return Background._strips[key]
+
+    def reset(self):
+        for group in self.groups:
+            group[2] = 0.0
 
     def update(self):
-        for rect in self.rects:
-            rect.x += Config.BG_SCROLL
-            if rect.right <= 0:
-                rect.x = Config.S_WIDTH
+        for group in self.groups:
+            width = group[0].get_width() * self.upscale
+            group[2] += group[1]
+            if group[2] <= -width:
+                group[2] += width
+            elif group[2] > 0:
+                group[2] -= width
 
-    def draw(self, screen):
-        screen.blits(blit_sequence=zip(self.images, self.rects))
+    def draw(self, screen, alpha: float=1.0):
+        if self.upscale == 1:
+            target = screen
+        else:
+            if self.canvas is None:
+                # the canvas shares the screen's format, so scaling it onto the screen is a plain copy
+                self.canvas = pygame.Surface(self.groups[0][0].get_size(), 0, screen)
+            target = self.canvas
+        blits = []
+        for strip, speed, offset in self.groups:
+            width = strip.get_width()
+            # interpolate back towards last tick's position, wrapping into (-width, 0]
+            x = offset + speed * (alpha - 1)
+            x = int(x // self.upscale) if self.upscale != 1 else int(x)
+            if x > 0:
+                x -= width
+            blits.append((strip, (x, 0)))
+            if x + width < target.get_width():
+                blits.append((strip, (x + width, 0)))
+        target.blits(blit_sequence=blits, doreturn=False)
+        if target is not screen:
+            pygame.transform.scale(target, screen.get_size(), screen)
 
 
 class SpriteObject(pygame.sprite.Sprite):
-    def __init__(self, image_path: str, alpha: bool=False, flip: bool=False, scale : float=1.0):
+    def __init__(self, world, image_path: str, alpha: bool=False, flip: bool=False, scale : float=1.0, rng=random):
         super().__init__()
         self.logger = logging.getLogger("runningman.visuals.SpriteObject")
-        self.image = pygame.image.load(image_path)
-        if alpha:
-            self.image = self.image.convert_alpha()
-        else:
-            self.image = self.image.convert()
+        self.world = world
+        self.load(image_path, alpha, flip, scale, rng)
+
+    def load(self, image_path: str, alpha: bool=False, flip: bool=False, scale : float=1.0, rng=random):
+        """Sets the sprite's image and resets its rect to match."""
         if flip:
-            self.image = self.flip_x(self.image)
-        if scale:
-            self.image = pygame.transform.scale_by(self.image, scale)
+            flip = self.flip_x(rng)
+        self.image = AssetRegistry.image(image_path, alpha, scale, flip)
         self.width = self.image.get_width()
         self.rect = self.image.get_rect()
 
     def update(self):
-        self.rect.x += Config.scroll
+        self.rect.x += self.world.scroll
         if self.rect.right <= 0:
             self.rect.x = Config.S_WIDTH
 
     @staticmethod
-    def flip_x(image: pygame.Surface) -> pygame.Surface:
-        """Randomly flips and returns a PyGame Surface"""
-        flip_x = random.randint(0, 1)
-        image = pygame.transform.flip(image, flip_x, False)
-        return image
+    def flip_x(rng=random) -> bool:
+        """Randomly decides whether a sprite should be mirrored horizontally."""
+        return bool(rng.randint(0, 1))
 
-class Tile(SpriteObject):
-    def __init__(self):
-        super().__init__("./assets/images/tile_ground.png")
-        self.prev = None
+class GroundStrip:
+    """
+    The ground tiles and foreground grass, pre-rendered into screen-wide chunks.
+
+    Two chunks are kept side by side and scrolled with the world's scroll, so the
+    whole layer costs two blits per frame. When a chunk scrolls off screen it
+    is replaced by a new chunk with freshly randomised grass, the chunk that
+    left is kept until the next swap for drawing interpolated frames.
+
+    Only every grass_step-th tuft is drawn into new chunks. The random draws
+    for skipped tufts are still made, so the grass that is drawn does not
+    depend on grass_step.
+    """
+    tile_path = "./assets/images/tile_ground.png"
+    grass_paths = [f"./assets/images/grass{i}.png" for i in range(4)]
+    # tiles overlap, each is placed 80% of a tile width after the previous one
+    tile_step = 0.8
+
+    def __init__(self, world, rng=random, width: int=Config.S_WIDTH):
+        self.logger = logging.getLogger("runningman.visuals.GroundStrip")
+        self.world = world
+        self.rng = rng
+        self.width = width
+        self.tile = AssetRegistry.image(GroundStrip.tile_path, alpha=False)
+        grass = [AssetRegistry.image(path) for path in GroundStrip.grass_paths]
+        grass_height = max(image.get_height() for image in grass)
+        self.top = Config.GROUND_HEIGHT - grass_height
+        self.height = Config.S_HEIGHT - self.top
+        self.grass_spacing = self.tile.get_width()
+        # with the tile and grass all opaque or keyed, chunks are keyed as they are built
+        keyed = all(image.get_masks()[3] == 0 for image in [self.tile] + grass)
+        self.key = AssetRegistry.free_key(self.tile, *grass) if keyed else None
+        self.offset = 0.0
+        self.grass_step = 1
+        # the chunk that last scrolled off, the visible chunk and the one after it
+        self.chunks = [self.make_chunk(), self.make_chunk(), self.make_chunk()]
+
+    def make_chunk(self) -> pygame.Surface:
+        """Renders one chunk of randomly placed grass with the ground tiles over it."""
+        if self.key is None:
+            chunk = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+        else:
+            chunk = pygame.Surface((self.width, self.height)).convert()
+            chunk.fill(self.key)
+        ground = Config.GROUND_HEIGHT - self.top
 
-    def get_right(self):
-        return self.rect.right
+        for i in range(self.width // self.grass_spacing):
+            path = self.rng.choice(GroundStrip.grass_paths)
+            grass = AssetRegistry.image(path, flip=SpriteObject.flip_x(self.rng))
+            x = min(max(0, i * self.grass_spacing - self.rng.randint(0, 20)), self.width - grass.get_width())
+            y = ground + self.rng.randint(0, 5)
+            if i % self.grass_step == 0:
+                chunk.blit(grass, grass.get_rect(bottomleft=(x, y)))
+
+        step = self.tile.get_width() * GroundStrip.tile_step
+        tiles = int(self.width / step) + 1
+        chunk.blits(((self.tile, (int(i * step), ground)) for i in range(tiles)), doreturn=False)
+        if self.key is None:
+            return AssetRegistry.optimise(chunk)
+        chunk.set_colorkey(self.key, pygame.RLEACCEL)
+        return chunk
 
     def update(self):
-        """Using a linked list, reassign tile to the end of the list."""
-        self.rect.x += Config.scroll
-        if self.rect.right <= 0:
-            if self.prev is None:
-                self.rect.x = Config.S_WIDTH
-            else:
-                self.rect.x = self.prev.get_right()
+        self.offset += self.world.scroll
+        if self.offset <= -self.width:
+            self.offset += self.width
+            self.chunks.pop(0)
+            self.chunks.append(self.make_chunk())
 
-class Grass(SpriteObject):
-    count = 4
-    paths = [f"./assets/images/grass{i}.png" for i in range(count)]
+    def draw(self, screen, alpha: float=1.0):
+        x = int(self.offset + self.world.scroll * (alpha - 1))
+        if x > 0:
+            screen.blit(self.chunks[0], (x - self.width, self.top))
+        screen.blits(
+            blit_sequence=((self.chunks[1], (x, self.top)), (self.chunks[2], (x + self.width, self.top))),
+            doreturn=False
+            )
 
-    def __init__(self):
-        path = random.choice(Grass.paths)
-        super().__init__(path, alpha=True, flip=True)
+class SceneryLayer:
+    """
+    Decorations that only scroll, stored as arrays instead of sprites.
+
+    Each entity is a row of x, y, width and image id, so the whole layer is
+    moved with one array operation per tick whatever its density. Entities
+    that scroll off the left edge either wrap to the right edge or are
+    removed, along with any image no other entity uses, and only those on
+    screen are blitted. Setting step draws only
+    every step-th entity, for thinning out layers that wrap rather than
+    remove, whose entities keep their index.
+
+    Methods
+    ---
+    add(image: pygame.Surface, **position) -> None
+        Adds an entity placed as image.get_rect(**position) would be.
+    update() -> None
+        Scrolls every entity by the world's scroll and wraps or removes
+        those that left the screen.
+    draw(screen: pygame.Surface, dx: int=0) -> None
+        Blits the entities on screen, offset horizontally by dx.
+    """
+    def __init__(self, world, wrap: bool=False):
+        self.logger = logging.getLogger("runningman.visuals.SceneryLayer")
+        self.world = world
+        self.wrap = wrap
+        self.step = 1
+        self.images = []
+        self._image_ids = {}
+        # rows of x, y, width and image id, grown by doubling, the first _count columns in use
+        self._data = np.zeros((4, 16), dtype=np.int32)
+        self._count = 0
 
-class Bush(SpriteObject):
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._data[0, :self._count]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._data[1, :self._count]
+
+    @property
+    def width(self) -> np.ndarray:
+        return self._data[2, :self._count]
+
+    @property
+    def image_id(self) -> np.ndarray:
+        return self._data[3, :self._count]
+
+    def add(self, image: pygame.Surface, **position) -> None:
+        image_id = self._image_ids.get(image)
+        if image_id is None:
+            image_id = self._image_ids[image] = len(self.images)
+            self.images.append(image)
+        if self._count == self._data.shape[1]:
+            self._data = np.concatenate((self._data, np.zeros_like(self._data)), axis=1)
+        rect = image.get_rect(**position)
+        self._data[:, self._count] = (rect.x, rect.y, rect.width, image_id)
+        self._count += 1
+
+    def update(self):
+        x = self.x
+        x += self.world.scroll
+        gone = x + self.width <= 0
+        if not gone.any():
+            return
+        if self.wrap:
+            x[gone] = Config.S_WIDTH
+        else:
+            kept = self._data[:, :self._count][:, ~gone]
+            self._count = kept.shape[1]
+            self._data[:, :self._count] = kept
+            self.prune()
+
+    def prune(self) -> None:
+        """Forgets the images no remaining entity uses, so their Surfaces can be freed."""
+        used = np.unique(self.image_id)
+        if len(used) == len(self.images):
+            return
+        self.images = [self.images[i] for i in used.tolist()]
+        self._image_ids = {image: i for i, image in enumerate(self.images)}
+        self._data[3, :self._count] = np.searchsorted(used, self.image_id)
+
+    def draw(self, screen: pygame.Surface, dx: int=0):
+        x = self.x + dx
+        visible = (x < Config.S_WIDTH) & (x + self.width > 0)
+        if self.step > 1:
+            visible[np.arange(len(x)) % self.step != 0] = False
+        images = self.images
+        screen.blits(
+            blit_sequence=[
+                (images[image_id], (left, top)) for image_id, left, top in zip(
+                    self.image_id[visible].tolist(), x[visible].tolist(), self.y[visible].tolist()
+                    )
+                ],
+            doreturn=False
+            )
+
+class Bush:
     count = 3
     paths = [f"./assets/images/bush{i}.png" for i in range(count)]
 
-    def __init__(self):
-        path = random.choice(Bush.paths)
-        super().__init__(path, alpha=True, flip=True, scale=random.uniform(0.5, 1.0))
+    @staticmethod
+    def image(rng=random) -> pygame.Surface:
+        """Returns a randomly chosen, scaled and mirrored bush image."""
+        path = rng.choice(Bush.paths)
+        scale = rng.uniform(0.5, 1.0)
+        return AssetRegistry.image(path, alpha=True, scale=scale, flip=SpriteObject.flip_x(rng), transient=True)
 
-class Tree(SpriteObject):
+class Tree:
     count = 2
     paths = [f"./assets/images/tree{i}.png" for i in range(count)]
 
-    def __init__(self):
-        path = random.choice(Tree.paths)
-        super().__init__(path, alpha=True, flip=True, scale=random.uniform(1.5, 2.5))
-
-    def update(self):
-        self.rect.x += Config.scroll
-        if self.rect.right <= 0:
-            self.kill()
+    @staticmethod
+    def image(rng=random) -> pygame.Surface:
+        """Returns a randomly chosen, scaled and mirrored tree image."""
+        path = rng.choice(Tree.paths)
+        scale = rng.uniform(1.5, 2.5)
+        return AssetRegistry.image(path, alpha=True, scale=scale, flip=SpriteObject.flip_x(rng), transient=True)
 
 class Heart(SpriteObject):
+    path = "./assets/images/heart.png"
+
     def __init__(self):
-        super().__init__("./assets/images/heart.png", alpha=True)
-        self.image = pygame.transform.scale2x(self.image)
+        super().__init__(None, Heart.path, alpha=True)
+        self.image = AssetRegistry.accelerate(pygame.transform.scale2x(self.image))
+        # shown for lost health, made once instead of changing the image's alpha every frame
+        self.faded = self.image.copy()
+        self.faded.set_alpha(100)
     
+class PlayerFrame(NamedTuple):
+    """A pre-rendered animation frame with its mirrored and faded variants and their masks."""
+    image: pygame.Surface
+    mirrored: pygame.Surface
+    faded: pygame.Surface
+    faded_mirrored: pygame.Surface
+    mask: pygame.mask.Mask
+    mirrored_mask: pygame.mask.Mask
+
 class PlayerSprites:
-    # update to load and store sprites in cache
-    def __init__(self, filename: str="./assets/adventurer/simple_adventurer.png"):
-        self.sprite_sheet = pygame.image.load(filename).convert()
+    """Slices the adventurer sheet into a table of PlayerFrame tuples, built once per sheet."""
+    _frame_tables = {}
+    faded_alpha = 100
+    sheet = "./assets/adventurer/simple_adventurer.png"
+
+    def __init__(self, filename: str=sheet):
+        self.filename = filename
+        self.sprite_sheet = AssetRegistry.source(filename, alpha=False)
         with open(filename.replace("png", "json")) as f:
             self.metadata = json.load(f)
         self.actions = self.metadata.keys()
 
+        if filename not in PlayerSprites._frame_tables:
+            PlayerSprites._frame_tables[filename] = {
+                action: tuple(self.build_frame(**sprite) for sprite in data["sprites"])
+                for action, data in self.metadata.items()
+            }
+        self.frames = PlayerSprites._frame_tables[filename]
+
     def num_frames(self, action: str):
         return self.metadata[action]["frames"]
 
     def get_sprite(self, x: int, y: int, w: int, h: int):
+        sprite = AssetRegistry.bundled_frame(self.filename, x, y, w, h)
+        if sprite is None:
+            sprite = AssetRegistry.optimise(self.slice(self.sprite_sheet, x, y, w, h))
+        return sprite
+
+    @staticmethod
+    def slice(sheet: pygame.Surface, x: int, y: int, w: int, h: int) -> pygame.Surface:
+        """Cuts a frame out of the sheet, keyed on black and scaled to its in-game size."""
         sprite = pygame.Surface((w, h))
         sprite.set_colorkey((0,0,0))
-        sprite.blit(self.sprite_sheet, (0, 0), (x, y, w, h))
-        sprite = pygame.transform.scale2x(sprite)
-        return sprite
+        sprite.blit(sheet, (0, 0), (x, y, w, h))
+        return pygame.transform.scale2x(sprite)
 
-    def parse_sprite(self, action: str, frame: int):
-        sprites = self.metadata[action]["sprites"]
-        if frame >= self.num_frames(action):
-            frame = self.num_frames(action) - 1
-        x, y, w, h = sprites[frame].values()
+    def build_frame(self, x: int, y: int, w: int, h: int) -> PlayerFrame:
         image = self.get_sprite(x, y, w, h)
-        return image
\ No newline at end of file
+        mirrored = AssetRegistry.accelerate(pygame.transform.flip(image, True, False))
+        faded = AssetRegistry.accelerate(image.copy())
+        faded.set_alpha(self.faded_alpha)
+        faded_mirrored = AssetRegistry.accelerate(mirrored.copy())
+        faded_mirrored.set_alpha(self.faded_alpha)
+        return PlayerFrame(
+            image, mirrored, faded, faded_mirrored,
+            pygame.mask.from_surface(image), pygame.mask.from_surface(mirrored)
+            )
+
+    def frame(self, action: str, frame: int) -> PlayerFrame:
+        frames = self.frames[action]
+        if frame >= len(frames):
+            frame = len(frames) - 1
+        return frames[frame]
+
+    def parse_sprite(self, action: str, frame: int):
+        return self.frame(action, frame).image
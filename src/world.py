@@ -0,0 +1,26 @@
+from .config import Config, GameState
+
+class World:
+    """
+    The mutable state of one game, read by its sprites and HUD.
+
+    Config only holds the defaults a World starts from, so every Game owns
+    its own World and several games can run in one process.
+    """
+    __slots__ = ("status", "base_scroll", "scroll", "distance")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.status = GameState.GAME_PLAY
+        # scroll speed without player input, grows as the game speeds up
+        self.base_scroll = Config.START_SCROLL
+        # scroll speed this tick, including the player's movement
+        self.scroll = Config.START_SCROLL
+        # pixels scrolled since the run started, the camera's position on the course
+        self.distance = 0
+
+    def advance(self) -> None:
+        """Moves the camera along the course by this tick's scroll."""
+        self.distance -= self.scroll